@@ -1,15 +1,148 @@
 #!/home/< USER >/miniconda3/envs/< CONDA_ENV >/bin/python
 
-import os
-os.environ["PYOPENGL_PLATFORM"] = "egl"
+import time
+_START = time.perf_counter()
+_START_CPU = time.process_time()
+_START_THREAD_CPU = time.thread_time()
 
+import os
 import sys
+import io
+import glob
 import argparse
-import numpy as np
+import collections
+import contextlib
+import functools
+import hashlib
+import importlib.util
+import json
+import math
+import mmap
+import multiprocessing
+import shutil
+import stat
+import struct
+import subprocess
 import tempfile
-import trimesh
-import pyrender
-from PIL import Image
+import threading
+import urllib.parse
+
+# 段階ごとの計測結果（--timings / --profile で表示）
+# start はプロセス起動からの秒数ではなく UNIX 時刻なので、ワーカープロセスの記録も同じ時間軸に並べられる
+# cpu はその段階を実行したスレッドの CPU 時間（エンコードスレッドや GL ドライバのスレッドの分は含まない）。
+# rss は段階の終了時点でのプロセス全体の最大常駐メモリで、段階ごとの使用量ではない
+Stage = collections.namedtuple("Stage", "label start wall cpu rss pid tid")
+TIMINGS = []
+COUNTERS = collections.Counter()
+_START_EPOCH = time.time() - (time.perf_counter() - _START)
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def peak_rss():
+    # このプロセスの最大常駐メモリ（バイト）。Linux の ru_maxrss は KB 単位、macOS はバイト単位
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+def record_stage(label, start, cpu_start):
+    wall = time.perf_counter() - start
+    TIMINGS.append(Stage(label, _START_EPOCH + (start - _START), wall,
+                         time.thread_time() - cpu_start, peak_rss(), os.getpid(), threading.get_native_id()))
+
+@contextlib.contextmanager
+def timed(label):
+    start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield
+    finally:
+        record_stage(label, start, cpu_start)
+
+def summarize_stages():
+    totals = collections.OrderedDict()
+    for stage in sorted(TIMINGS, key=lambda stage: stage.start):
+        count, wall, cpu, rss = totals.get(stage.label, (0, 0.0, 0.0, 0))
+        totals[stage.label] = (count + 1, wall + stage.wall, cpu + stage.cpu, max(rss, stage.rss))
+    return totals
+
+def print_timings():
+    print("\n⏱️ Timings")
+    for label, (count, seconds, _, _) in summarize_stages().items():
+        name = label if count == 1 else f"{label} (x{count})"
+        print(f"  {name:<28} {seconds * 1000:9.1f} ms")
+    print(f"  {'total':<28} {(time.perf_counter() - _START) * 1000:9.1f} ms")
+
+def print_profile():
+    # 入れ子の段階（load model の中の parse OBJ など）はそれぞれの行に重ねて計上される
+    print("\n📈 Profile (wall / stage-thread CPU time per stage; process-wide peak RSS when the stage ended)")
+    print(f"  {'stage':<30} {'count':>5} {'wall ms':>10} {'cpu ms':>10} {'cpu/wall':>8} {'proc RSS':>10}")
+    for label, (count, wall, cpu, rss) in summarize_stages().items():
+        ratio = f"{cpu / wall:.2f}" if wall > 0 else "-"
+        print(f"  {label:<30} {count:>5} {wall * 1000:10.1f} {cpu * 1000:10.1f} {ratio:>8} {format_bytes(rss):>10}")
+    print(f"  {'total':<30} {'':>5} {(time.perf_counter() - _START) * 1000:10.1f} {(time.process_time() - _START_CPU) * 1000:10.1f}"
+          f" {'':>8} {format_bytes(peak_rss()):>10}")
+    for name, value in COUNTERS.items():
+        shown = format_bytes(value) if name.endswith("bytes") else f"{value:,}"
+        print(f"  {name:<30} {shown:>16}")
+
+def write_trace(path):
+    # Chrome の trace event 形式（chrome://tracing や Perfetto で開ける）。プロセスごとに1行のタイムライン
+    # エンコード用スレッドの段階は別の tid に並ぶ
+    events = [{"name": "process_name", "ph": "M", "pid": pid, "tid": pid,
+               "args": {"name": "ezrender" if pid == os.getpid() else f"worker {pid}"}}
+              for pid in sorted({stage.pid for stage in TIMINGS})]
+    for stage in TIMINGS:
+        events.append({
+            "name": stage.label, "ph": "X", "pid": stage.pid, "tid": stage.tid,
+            "ts": round((stage.start - _START_EPOCH) * 1e6, 1), "dur": round(stage.wall * 1e6, 1),
+            "args": {"thread_cpu_ms": round(stage.cpu * 1000, 3), "process_peak_rss_mb": round(stage.rss / 2**20, 1)},
+        })
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms", "otherData": dict(COUNTERS)}, f)
+    print(f"📝 Trace written: {path}")
+
+def detect_gl_platform():
+    # GPU があれば EGL、CPU のみのノードでは OSMesa（libOSMesa が無ければ EGL のまま）
+    if glob.glob("/dev/dri/renderD*") or os.path.exists("/dev/nvidia0"):
+        return "egl"
+    import ctypes.util
+    return "osmesa" if ctypes.util.find_library("OSMesa") else "egl"
+
+def setup_gl_platform():
+    # PyOpenGL は import 時にプラットフォームを決めるので、pyrender より先に呼ぶ
+    if "PYOPENGL_PLATFORM" not in os.environ:
+        os.environ["PYOPENGL_PLATFORM"] = detect_gl_platform()
+    return os.environ["PYOPENGL_PLATFORM"]
+
+class LazyModule:
+    # 初めて属性にアクセスされた時点で import するモジュールの代理。
+    # import 後はモジュールのグローバル変数を本物のモジュールに差し替える。
+    def __init__(self, name, alias, setup=None):
+        self._name = name
+        self._alias = alias
+        self._setup = setup
+
+    def __getattr__(self, attr):
+        if self._setup is not None:
+            self._setup()
+        # sys.modules には初期化途中のモジュールも入っているので、別スレッド（書き出しスレッドなど）が
+        # 読み込み中でも、モジュールごとのロックで待つ import_module を必ず通す
+        if self._name in sys.modules:
+            module = importlib.import_module(self._name)
+        else:
+            with timed(f"import {self._name}"):
+                module = importlib.import_module(self._name)
+        globals()[self._alias] = module
+        return getattr(module, attr)
+
+np = LazyModule("numpy", "np")
+trimesh = LazyModule("trimesh", "trimesh")
+pyrender = LazyModule("pyrender", "pyrender", setup=setup_gl_platform)
+Image = LazyModule("PIL.Image", "Image")
 
 def srgb_to_linear(c):
     c = np.clip(c, 0.0, 1.0)
@@ -19,27 +152,37 @@ def srgb_to_linear(c):
         ((c + 0.055) / 1.055) ** 2.4
     )
 
-def convert_obj_srgb_to_linear(input_path):
-    temp_fd, temp_path = tempfile.mkstemp(suffix=".obj")
-    os.close(temp_fd)
-    with open(input_path, 'r') as fin, open(temp_path, 'w') as fout:
-        for line in fin:
-            if line.startswith('v '):
-                parts = line.strip().split()
-                if len(parts) == 7:
-                    try:
-                        r, g, b = map(float, parts[4:7])
-                        rgb = np.array([r, g, b])
-                        linear = srgb_to_linear(rgb)
-                        newline = f"v {parts[1]} {parts[2]} {parts[3]} {linear[0]:.6f} {linear[1]:.6f} {linear[2]:.6f}\n"
-                        fout.write(newline)
-                    except:
-                        fout.write(line)
-                else:
-                    fout.write(line)
-            else:
-                fout.write(line)
-    return temp_path
+def convert_obj_srgb_to_linear(geometry):
+    # load_obj が返したメッシュ引数の頂点カラー配列を、メモリ上でまとめて Linear に変換する
+    converted = 0
+    for mesh_kwargs in geometry.values():
+        vc = mesh_kwargs.get("vertex_colors")
+        if vc is not None:
+            mesh_kwargs["vertex_colors"] = srgb_to_linear(vc)
+            converted += len(vc)
+    return converted
+
+def load_obj_linear(path):
+    # 頂点カラーOBJは高速ローダで一括パースし、カラー配列をそのまま変換する。
+    # パース中に UV・法線・マテリアル（vt / vn / usemtl / mtllib）が見つかったら、それらも読める trimesh に切り替える
+    from objio import OBJFeatureError, load_vertex_color_obj
+    try:
+        with timed("parse OBJ"):
+            vertices, colors, faces = load_vertex_color_obj(path, plain_only=True)
+    except OBJFeatureError:
+        pass
+    else:
+        with timed("sRGB → linear"):
+            linear = srgb_to_linear(colors) if colors is not None else None
+        mesh = trimesh.Trimesh(vertices=vertices, faces=faces, vertex_colors=linear)
+        return trimesh.Scene(mesh), len(vertices) if colors is not None else 0
+    with open(path, "rb") as f:
+        with timed("parse OBJ"):
+            kwargs = trimesh.exchange.obj.load_obj(f, resolver=trimesh.resolvers.FilePathResolver(path))
+    with timed("sRGB → linear"):
+        converted = convert_obj_srgb_to_linear(kwargs["geometry"])
+    geometry = {name: trimesh.Trimesh(**mesh_kwargs) for name, mesh_kwargs in kwargs["geometry"].items()}
+    return trimesh.Scene(geometry), converted
 
 def look_at_view_matrix(eye, target, up=[0, 1, 0]):
     forward = np.array(target) - np.array(eye)
@@ -65,6 +208,58 @@ def spherical_camera_position(center, distance, angle_deg):
     y = distance * 0.1
     return center + np.array([x, y, z])
 
+def orbit_camera_positions(center, distance, angles_deg):
+    # spherical_camera_position をまとめて計算したもの (n, 3)
+    theta = np.radians(np.asarray(angles_deg, dtype=np.float64))
+    offsets = np.stack([np.cos(theta), np.full_like(theta, 0.1), np.sin(theta)], axis=1)
+    return np.asarray(center) + distance * offsets
+
+def fibonacci_camera_positions(center, distance, n):
+    # 球面上にほぼ等間隔に並ぶ n 点（フィボナッチ格子）
+    i = np.arange(n, dtype=np.float64) + 0.5
+    y = 1.0 - 2.0 * i / n
+    r = np.sqrt(1.0 - y * y)
+    phi = np.pi * (3.0 - np.sqrt(5.0)) * i
+    return np.asarray(center) + distance * np.stack([r * np.cos(phi), y, r * np.sin(phi)], axis=1)
+
+def look_at_poses(eyes, target, up=(0.0, 1.0, 0.0)):
+    # look_at_view_matrix の逆行列（カメラ→ワールド、OpenGL 座標系で -z が視線方向）を (n, 4, 4) でまとめて求める
+    eyes = np.asarray(eyes, dtype=np.float64)
+    forward = np.asarray(target, dtype=np.float64) - eyes
+    forward /= np.linalg.norm(forward, axis=1, keepdims=True)
+    right = np.cross(forward, up)
+    length = np.linalg.norm(right, axis=1)
+    # 真上・真下から見るカメラでは up と視線が平行になるので、z 軸を代わりの up にする
+    parallel = length < 1e-8
+    right[parallel] = np.cross(forward[parallel], (0.0, 0.0, -1.0))
+    right /= np.linalg.norm(right, axis=1, keepdims=True)
+    poses = np.zeros((len(eyes), 4, 4))
+    poses[:, :3, 0] = right
+    poses[:, :3, 1] = np.cross(right, forward)
+    poses[:, :3, 2] = -forward
+    poses[:, :3, 3] = eyes
+    poses[:, 3, 3] = 1.0
+    return poses
+
+def load_camera_file(path):
+    # カメラ一覧の読み込み。以下のどちらかを返す
+    #   (n, 4, 4) のカメラ→ワールド行列：transforms.json（frames[].transform_matrix）、または 4x4 行列の JSON リスト
+    #   (n, 3) のカメラ位置（モデル中心を向く）：[x, y, z] の JSON リスト、または1行に "x,y,z"（空白区切りも可）のテキスト
+    with open(path) as f:
+        text = f.read()
+    if path.lower().endswith(".json"):
+        data = json.loads(text)
+        if isinstance(data, dict):
+            data = [frame["transform_matrix"] for frame in data["frames"]]
+        cameras = np.asarray(data, dtype=np.float64)
+    else:
+        rows = [line.replace(",", " ").split() for line in text.splitlines()]
+        cameras = np.asarray([[float(x) for x in row] for row in rows if row and not row[0].startswith("#")],
+                             dtype=np.float64)
+    if cameras.ndim == 2 and cameras.shape[1] == 3 or cameras.ndim == 3 and cameras.shape[1:] == (4, 4):
+        return cameras
+    raise ValueError(f"{path}: cameras must be x,y,z positions or 4x4 camera-to-world matrices")
+
 def parse_xyz(text):
     try:
         parts = [float(x.strip()) for x in text.split(",")]
@@ -81,6 +276,23 @@ def parse_size(text):
     except:
         raise argparse.ArgumentTypeError("--size は WIDTHxHEIGHT（例: 800x600）形式")
 
+def parse_grid(text):
+    try:
+        cols, rows = text.lower().split("x")
+        cols, rows = int(cols), int(rows)
+        if cols < 1 or rows < 1:
+            raise ValueError
+        return cols, rows
+    except:
+        raise argparse.ArgumentTypeError("--grid は COLSxROWS（例: 6x6）形式")
+
+def turntable_grid(args):
+    # --grid が無ければ ceil(sqrt(N)) 列のほぼ正方形に並べる（横一列だと WebP の幅の上限をすぐに超える）
+    if args.grid is not None:
+        return args.grid
+    cols = math.ceil(math.sqrt(args.views))
+    return cols, math.ceil(args.views / cols)
+
 def describe_color_attribution(mesh):
     kind = mesh.visual.kind
     if kind == "vertex":
@@ -111,107 +323,1276 @@ def print_scene_info(scene):
         table.append(row)
     print(tabulate(table, headers=headers, tablefmt="grid"))
 
+GLTF_COMPONENT_SIZES = {5120: 1, 5121: 1, 5122: 2, 5123: 2, 5125: 4, 5126: 4}
+GLTF_TYPE_COMPONENTS = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT2": 4, "MAT3": 9, "MAT4": 16}
+
+def format_bytes(size):
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024.0:
+            return f"{size:.1f} {unit}"
+        size /= 1024.0
+    return f"{size:.1f} TB"
+
+def read_glb_json(path):
+    # GLB をメモリマップし、先頭の JSON チャンクだけを読む（BIN チャンクには触れない）
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        magic, version, _ = struct.unpack_from("<4sII", mm, 0)
+        if magic != b"glTF" or version != 2:
+            raise ValueError(f"Not a glTF 2.0 binary: {path}")
+        chunk_length, chunk_type = struct.unpack_from("<I4s", mm, 12)
+        if chunk_type != b"JSON":
+            raise ValueError(f"First GLB chunk is not JSON: {path}")
+        return json.loads(mm[20:20 + chunk_length])
+
+def glb_primitive_rows(gltf):
+    accessors = gltf.get("accessors", [])
+    buffer_views = gltf.get("bufferViews", [])
+    materials = gltf.get("materials", [])
+
+    def accessor_bytes(index):
+        acc = accessors[index]
+        return acc["count"] * GLTF_COMPONENT_SIZES.get(acc["componentType"], 4) * GLTF_TYPE_COMPONENTS.get(acc["type"], 1)
+
+    rows = []
+    for i, mesh in enumerate(gltf.get("meshes", [])):
+        primitives = mesh.get("primitives", [])
+        for j, prim in enumerate(primitives):
+            attrs = prim.get("attributes", {})
+            vertices = accessors[attrs["POSITION"]]["count"] if "POSITION" in attrs else 0
+            corners = accessors[prim["indices"]]["count"] if "indices" in prim else vertices
+            mode = prim.get("mode", 4)
+            if mode == 4:
+                faces = corners // 3
+            elif mode in (5, 6):
+                faces = max(corners - 2, 0)
+            else:
+                faces = 0
+
+            draco = prim.get("extensions", {}).get("KHR_draco_mesh_compression")
+            if draco is not None:
+                size = buffer_views[draco["bufferView"]].get("byteLength", 0)
+            else:
+                used = list(attrs.values()) + ([prim["indices"]] if "indices" in prim else [])
+                size = sum(accessor_bytes(a) for a in used)
+
+            material = materials[prim["material"]] if "material" in prim else {}
+            base_texture = material.get("pbrMetallicRoughness", {}).get("baseColorTexture")
+            if base_texture is not None and "TEXCOORD_0" in attrs:
+                color = "Texture Mapping (UV + Image)"
+            elif "COLOR_0" in attrs:
+                color = f"Vertex Color ({'RGBA' if accessors[attrs['COLOR_0']]['type'] == 'VEC4' else 'RGB'})"
+            else:
+                color = "None"
+
+            rows.append([
+                f"{i}" if len(primitives) == 1 else f"{i}.{j}",
+                str(vertices),
+                str(faces),
+                color,
+                "Yes" if "TEXCOORD_0" in attrs else "No",
+                format_bytes(size),
+            ])
+    return rows
+
+def print_glb_info(path):
+    from tabulate import tabulate
+    gltf = read_glb_json(path)
+    rows = glb_primitive_rows(gltf)
+    images = gltf.get("images", [])
+    print(f"🔍 Model Information (Total Meshes: {len(rows)}, Images: {len(images)}, File: {format_bytes(os.path.getsize(path))})\n")
+    headers = ["Mesh", "Vertices", "Faces", "Color Attribution", "UV Mapping", "Buffer Size"]
+    print(tabulate(rows, headers=headers, tablefmt="grid"))
+
+# 縦方向の画角（ラジアン）。深度から法線を求めるときにも使う
+CAMERA_YFOV = math.pi / 6.0
+
+def count_uploads(scene):
+    # GL コンテキストへ送られる三角形数・テクスチャ数（--profile で表示）
+    textures = set()
+    for mesh in scene.meshes:
+        for primitive in mesh.primitives:
+            if primitive.indices is not None:
+                COUNTERS["triangles uploaded"] += len(primitive.indices)
+            else:
+                COUNTERS["triangles uploaded"] += len(primitive.positions) // 3
+            if primitive.material is not None:
+                textures |= primitive.material.textures
+    COUNTERS["textures uploaded"] += len(textures)
+    COUNTERS["texture bytes"] += sum(t.source.nbytes for t in textures if hasattr(t.source, "nbytes"))
+
+class RenderSession:
+    # OffscreenRenderer（GLコンテキスト）とカメラ・ライトのノードを使い回す。
+    # 視点ごとにはポーズだけを差し替え、レンダラの再生成はサイズ変更時のみ行う。
+    # measure_upload=True（--timings / --profile）のときだけ、GPU への転送を描画と分けて計測する。
+    def __init__(self, width, height, measure_upload=False):
+        self.width = width
+        self.height = height
+        self.measure_upload = measure_upload
+        with timed("create GL context"):
+            self.renderer = pyrender.OffscreenRenderer(width, height)
+        self.scene = None
+        self.camera_node = None
+        self.light_node = None
+        self.uploaded = False
+
+    def set_scene(self, scene, intensity):
+        if scene is not self.scene:
+            self.detach()
+            self.scene = scene
+            self.uploaded = False
+            self.camera_node = scene.add(pyrender.PerspectiveCamera(yfov=CAMERA_YFOV), pose=np.eye(4))
+            self.light_node = scene.add(pyrender.PointLight(color=np.ones(3), intensity=intensity), pose=np.eye(4))
+        self.light_node.light.intensity = intensity
+
+    def resize(self, width, height):
+        if (width, height) == (self.width, self.height):
+            return
+        with timed("delete GL context"):
+            self.renderer.delete()
+        self.width = width
+        self.height = height
+        with timed("create GL context"):
+            self.renderer = pyrender.OffscreenRenderer(width, height)
+        self.uploaded = False
+
+    def upload(self):
+        # pyrender は最初の render() でメッシュとテクスチャを GPU に送るので、計測時だけその部分を先に済ませて別に計る
+        # （OffscreenRenderer._renderer._update_context は pyrender 0.1.45 の内部 API なので、通常の描画では使わない）
+        count_uploads(self.scene)
+        renderer = getattr(self.renderer, "_renderer", None)
+        if self.measure_upload and renderer is not None and hasattr(renderer, "_update_context"):
+            with timed("GPU upload"):
+                self.renderer._platform.make_current()
+                renderer._update_context(self.scene, pyrender.RenderFlags.RGBA)
+        self.uploaded = True
+
+    def render_buffers(self, pose):
+        # 1回の描画で得られるカラー (h, w, 4) uint8 と深度 (h, w) float32（背景は 0）を返す
+        self.scene.set_pose(self.camera_node, pose)
+        self.scene.set_pose(self.light_node, pose)
+        if not self.uploaded:
+            self.upload()
+        with timed("render (draw + readback)"):
+            color, depth = self.renderer.render(self.scene, flags=pyrender.RenderFlags.RGBA)
+        COUNTERS["frames rendered"] += 1
+        return color, depth
+
+    def render_array(self, pose):
+        return self.render_buffers(pose)[0]
+
+    def render(self, pose):
+        return Image.fromarray(self.render_array(pose), mode="RGBA")
+
+    def detach(self):
+        # 別のシーンに切り替える前に、カメラ・ライトのノードを元のシーンから外す
+        if self.scene is not None:
+            self.scene.remove_node(self.camera_node)
+            self.scene.remove_node(self.light_node)
+            self.scene = None
+
+    def close(self):
+        self.detach()
+        if self.renderer is not None:
+            with timed("delete GL context"):
+                self.renderer.delete()
+            self.renderer = None
+
+@functools.lru_cache(maxsize=None)
+def orbit_frames_class():
+    # PIL を遅延 import するため、Image.Image のサブクラスは初回利用時に定義する
+    class OrbitFrames(Image.Image):
+        # PIL の複数フレーム画像として振る舞い、seek() されたフレームをその場でレンダリングする。
+        # save_all=True で保存すると、1フレームずつ生成しながらアニメーションWebPへ流し込める。
+        def __init__(self, render_frame, n_frames):
+            super().__init__()
+            self._render_frame = render_frame
+            self.n_frames = n_frames
+            self.is_animated = n_frames > 1
+            self._frame = -1
+            self._first = None
+            self.seek(0)
+
+        def seek(self, frame):
+            if frame != self._frame:
+                # save_all は書き出しの最後に最初のフレームへ seek し直すので、フレーム0は描画し直さず保持しておく
+                if frame == 0 and self._first is not None:
+                    rendered = self._first
+                else:
+                    rendered = Image.fromarray(self._render_frame(frame), mode="RGBA")
+                    if frame == 0:
+                        self._first = rendered
+                self.__dict__.update(rendered.__dict__)
+                self._frame = frame
+
+        def tell(self):
+            return self._frame
+
+    return OrbitFrames
+
 def render_image(scene, pose, width, height, intensity):
-    camera = pyrender.PerspectiveCamera(yfov=np.pi / 6.0)
-    camera_node = scene.add(camera, pose=pose)
-    light = pyrender.PointLight(color=np.ones(3), intensity=intensity)
-    light_node = scene.add(light, pose=pose)
-    renderer = pyrender.OffscreenRenderer(width, height)
-    color, _ = renderer.render(scene, flags=pyrender.RenderFlags.RGBA)
-    renderer.delete()
-    scene.remove_node(camera_node)
-    scene.remove_node(light_node)
-    return Image.fromarray(color, mode="RGBA")
+    session = RenderSession(width, height)
+    try:
+        session.set_scene(scene, intensity)
+        return session.render(pose)
+    finally:
+        session.close()
 
-def main():
-    parser = argparse.ArgumentParser(description="Render a 3D model to a still image")
-    parser.add_argument("model_file", help="3D model file (.obj or .glb)")
-    group = parser.add_mutually_exclusive_group()
-    group.add_argument("--distance", type=float, help="Distance from model center (spherical)")
-    group.add_argument("--cam-xyz", type=parse_xyz, help="Camera position x,y,z")
-    parser.add_argument("--angle", type=float, help="Azimuth angle (degrees)")
-    parser.add_argument("--output", type=str, help="Output file (.webp)")
-    parser.add_argument("--no-view", action="store_true", help="Disable timg preview (default is ON)")
-    parser.add_argument("--info", action="store_true", help="Display model information")
-    parser.add_argument("--size", type=parse_size, default=(512, 512), help="Output size WIDTHxHEIGHT (default: 512x512)")
-    parser.add_argument("--light-intensity", type=float, help="Light intensity (auto if omitted)")
+MODEL_EXTENSIONS = (".obj", ".glb")
 
-    args = parser.parse_args()
-    show_view = not args.no_view
+def expand_model_paths(patterns, manifest=None):
+    patterns = list(patterns)
+    if manifest:
+        base_dir = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest) as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    patterns.append(line if os.path.isabs(line) else os.path.join(base_dir, line))
+    paths = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            paths.extend(sorted(glob.glob(pattern, recursive=True)))
+        elif os.path.isdir(pattern):
+            paths.extend(sorted(
+                os.path.join(pattern, name) for name in os.listdir(pattern)
+                if name.lower().endswith(MODEL_EXTENSIONS)
+            ))
+        else:
+            paths.append(pattern)
+    return paths
 
-    if not os.path.exists(args.model_file):
-        print("File not found:", args.model_file)
-        sys.exit(1)
+WEBP_MAX_DIMENSION = 16383
+
+def format_output_path(template, model_file, angle):
+    stem = os.path.splitext(os.path.basename(model_file))[0]
+    out = template.format(stem=stem, angle=angle)
+    return out if out.lower().endswith(".webp") else out + ".webp"
+
+PBR_TEXTURES = ("baseColorTexture", "metallicRoughnessTexture", "normalTexture", "emissiveTexture", "occlusionTexture")
+PBR_VALUES = ("baseColorFactor", "metallicFactor", "roughnessFactor", "emissiveFactor", "doubleSided", "alphaMode", "alphaCutoff")
 
-    temp_file = None
-    model_file = args.model_file
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "ezrender")
+
+class SceneCache:
+    # 読み込み・色変換済みのシーンを .npy 配列群として保存するディスクキャッシュ。
+    # キーは パス + mtime + サイズ。各配列は mmap で読み出し、容量超過時は古い順（LRU）に削除する。
+    VERSION = 1
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def key(self, path, variant=""):
+        st = os.stat(path)
+        ident = f"{self.VERSION}:{os.path.abspath(path)}:{st.st_mtime_ns}:{st.st_size}:{variant}"
+        return hashlib.sha1(ident.encode("utf-8")).hexdigest()
+
+    def load(self, path, variant=""):
+        entry = os.path.join(self.cache_dir, self.key(path, variant))
+        meta_path = os.path.join(entry, "meta.json")
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        def array(name):
+            return np.load(os.path.join(entry, name + ".npy"), mmap_mode="c")
+
+        scene = trimesh.Scene()
+        for i, info in enumerate(meta["geometry"]):
+            prefix = f"g{i}_"
+            visual = None
+            if info["visual"] == "vertex":
+                visual = trimesh.visual.ColorVisuals(vertex_colors=array(prefix + "vertex_colors"))
+            elif info["visual"] == "face":
+                visual = trimesh.visual.ColorVisuals(face_colors=array(prefix + "face_colors"))
+            elif info["visual"] == "texture":
+                material = info["material"]
+                images = {name: Image.fromarray(np.asarray(array(prefix + name))) for name in material["textures"]}
+                if material["kind"] == "pbr":
+                    mat = trimesh.visual.material.PBRMaterial(**material["values"], **images)
+                else:
+                    mat = trimesh.visual.material.SimpleMaterial(image=images.get("image"))
+                visual = trimesh.visual.TextureVisuals(uv=array(prefix + "uv"), material=mat)
+            mesh = trimesh.Trimesh(
+                vertices=array(prefix + "vertices"),
+                faces=array(prefix + "faces"),
+                vertex_normals=array(prefix + "vertex_normals"),
+                visual=visual,
+                process=False,
+            )
+            scene.geometry[info["name"]] = mesh
+        for node, geom_name, matrix in meta["instances"]:
+            scene.graph.update(frame_to=node, frame_from=scene.graph.base_frame,
+                               matrix=np.array(matrix), geometry=geom_name)
+        os.utime(meta_path)
+        return scene
+
+    def store(self, path, scene, variant=""):
+        meta = {"source": os.path.abspath(path), "geometry": [], "instances": []}
+        arrays = {}
+        for i, (name, mesh) in enumerate(scene.geometry.items()):
+            if not isinstance(mesh, trimesh.Trimesh):
+                return False
+            prefix = f"g{i}_"
+            info = {"name": name, "visual": "none"}
+            arrays[prefix + "vertices"] = mesh.vertices
+            arrays[prefix + "faces"] = mesh.faces
+            arrays[prefix + "vertex_normals"] = mesh.vertex_normals
+            kind = mesh.visual.kind
+            if kind == "vertex":
+                info["visual"] = "vertex"
+                arrays[prefix + "vertex_colors"] = mesh.visual.vertex_colors
+            elif kind == "face":
+                info["visual"] = "face"
+                arrays[prefix + "face_colors"] = mesh.visual.face_colors
+            elif kind == "texture":
+                mat = mesh.visual.material
+                if isinstance(mat, trimesh.visual.material.PBRMaterial):
+                    material = {"kind": "pbr", "textures": [], "values": {}}
+                    for attr in PBR_VALUES:
+                        value = getattr(mat, attr, None)
+                        if value is not None:
+                            material["values"][attr] = np.asarray(value).tolist() if isinstance(value, np.ndarray) else value
+                    textures = {attr: getattr(mat, attr, None) for attr in PBR_TEXTURES}
+                elif isinstance(mat, trimesh.visual.material.SimpleMaterial):
+                    material = {"kind": "simple", "textures": []}
+                    textures = {"image": mat.image}
+                else:
+                    return False
+                for attr, img in textures.items():
+                    if img is None:
+                        continue
+                    if img.mode not in ("L", "LA", "RGB", "RGBA"):
+                        img = img.convert("RGBA")
+                    material["textures"].append(attr)
+                    arrays[prefix + attr] = np.asarray(img)
+                info["visual"] = "texture"
+                info["material"] = material
+                arrays[prefix + "uv"] = mesh.visual.uv
+            meta["geometry"].append(info)
+        for node in scene.graph.nodes_geometry:
+            matrix, geom_name = scene.graph[node]
+            meta["instances"].append([node, geom_name, matrix.tolist()])
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry = os.path.join(self.cache_dir, self.key(path, variant))
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=self.cache_dir)
+        try:
+            for name, value in arrays.items():
+                np.save(os.path.join(tmp, name + ".npy"), np.ascontiguousarray(value))
+            with open(os.path.join(tmp, "meta.json"), "w") as f:
+                json.dump(meta, f)
+            os.rename(tmp, entry)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            return False
+        self.evict()
+        return True
+
+    def evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            entry = os.path.join(self.cache_dir, name)
+            meta_path = os.path.join(entry, "meta.json")
+            if name.startswith(".") or not os.path.exists(meta_path):
+                continue
+            size = sum(e.stat().st_size for e in os.scandir(entry))
+            entries.append((os.path.getmtime(meta_path), size, entry))
+            total += size
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+def open_scene_cache(args):
+    if args.no_cache:
+        return None
+    return SceneCache(args.cache_dir or default_cache_dir(), int(args.cache_size * 1024 * 1024))
+
+def load_scene(model_file, cache=None):
+    if not os.path.exists(model_file):
+        raise FileNotFoundError(f"File not found: {model_file}")
+    if cache is not None:
+        try:
+            tri_scene = cache.load(model_file)
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable cache entry: {e}")
+            tri_scene = None
+        if tri_scene is not None:
+            print("⚡ Loaded from cache")
+            return tri_scene
     if model_file.lower().endswith(".obj"):
         try:
-            temp_file = convert_obj_srgb_to_linear(model_file)
-            print(f"🎨 Converted OBJ sRGB → Linear: {temp_file}")
-            model_file = temp_file
+            tri_scene, converted = load_obj_linear(model_file)
         except Exception as e:
-            print("❌ OBJ変換に失敗しました:", e)
-            sys.exit(1)
+            raise RuntimeError(f"OBJ変換に失敗しました: {e}") from e
+        print(f"🎨 Converted OBJ sRGB → Linear: {converted} vertices")
+    else:
+        tri_scene = load_model(model_file)
+    if cache is not None:
+        try:
+            cache.store(model_file, tri_scene)
+        except Exception as e:
+            print(f"⚠️ Could not write cache entry: {e}")
+    return tri_scene
+
+# ---- プレビュー用 LOD（--lod） ----
+# 出力解像度に対して多すぎるポリゴンを pymeshlab の quadric decimation で間引く。
+# 作成した LOD はモデルと同じディレクトリの .ezrender_lod/ に保存し、次回以降はそれを読み込む。
+LOD_MIN_FACES = 20000
+LOD_DIR_NAME = ".ezrender_lod"
+
+def parse_lod(text):
+    text = text.lower()
+    if text in ("off", "auto"):
+        return text
+    try:
+        faces = int(text)
+        if faces < 1:
+            raise ValueError
+        return faces
+    except ValueError:
+        raise argparse.ArgumentTypeError("--lod は off / auto / 面数（例: 200000）")
+
+def lod_face_budget(args):
+    if args.lod == "off":
+        return None
+    if args.lod == "auto":
+        width, height = args.size
+        return max(LOD_MIN_FACES, width * height // 2)
+    return args.lod
 
-    tri_scene = load_model(model_file)
+def lod_cache_for(model_file, args):
+    lod_dir = os.path.join(os.path.dirname(os.path.abspath(model_file)), LOD_DIR_NAME)
+    return SceneCache(lod_dir, int(args.cache_size * 1024 * 1024))
+
+def decimate_mesh(mesh, target_faces):
+    import pymeshlab
+    colors = mesh.visual.vertex_colors / 255.0 if mesh.visual.kind == "vertex" else None
+    kwargs = {"vertex_matrix": np.asarray(mesh.vertices, dtype=np.float64),
+              "face_matrix": np.asarray(mesh.faces, dtype=np.int32)}
+    if colors is not None:
+        # pymeshlab.Mesh は v_color_matrix=None を受け付けないので、色があるときだけ渡す
+        kwargs["v_color_matrix"] = colors
+    ms = pymeshlab.MeshSet()
+    ms.add_mesh(pymeshlab.Mesh(**kwargs))
+    ms.meshing_decimation_quadric_edge_collapse(targetfacenum=int(target_faces), preservenormal=True)
+    out = ms.current_mesh()
+    return trimesh.Trimesh(
+        vertices=out.vertex_matrix(),
+        faces=out.face_matrix(),
+        vertex_colors=out.vertex_color_matrix() if colors is not None else None,
+        process=False,
+    )
+
+def make_lod_scene(tri_scene, budget):
+    # 面数に比例して予算を配分し、テクスチャ付きメッシュ（UV が崩れる）と面カラーのメッシュ（面の対応が変わる）はそのまま残す
+    meshes = [(name, mesh) for name, mesh in tri_scene.geometry.items() if isinstance(mesh, trimesh.Trimesh)]
+    total = sum(len(mesh.faces) for _, mesh in meshes)
+    if total <= budget:
+        return None
+    if importlib.util.find_spec("pymeshlab") is None:
+        print("⚠️ --lod requires pymeshlab (pip install pymeshlab); rendering at full detail")
+        return None
+    # Scene.copy() は全ジオメトリを複製してしまうので、グラフだけを複製し、間引いたメッシュ以外は元のオブジェクトを共有する
+    lod = trimesh.Scene(base_frame=tri_scene.graph.base_frame, metadata=tri_scene.metadata,
+                        graph=tri_scene.graph.copy())
+    lod.geometry.update(tri_scene.geometry)
+    for name, mesh in meshes:
+        target = max(int(budget * len(mesh.faces) / total), 4)
+        if len(mesh.faces) > target and mesh.visual.kind not in ("texture", "face"):
+            lod.geometry[name] = decimate_mesh(mesh, target)
+    return lod
+
+def load_lod_scene(model_file, budget, args):
+    # LOD が既に保存されていればそれを返し、無ければ元のモデルから作る
+    variant = f"lod{budget}"
+    lod_cache = None if args.no_cache else lod_cache_for(model_file, args)
+    if lod_cache is not None:
+        try:
+            lod = lod_cache.load(model_file, variant)
+        except Exception:
+            lod = None
+        if lod is not None:
+            print(f"🔻 Loaded LOD ({budget} faces budget) from {lod_cache.cache_dir}")
+            return lod
+    tri_scene = load_scene(model_file, open_scene_cache(args))
+    with timed("decimate"):
+        lod = make_lod_scene(tri_scene, budget)
+    if lod is None:
+        return tri_scene
+    before = sum(len(m.faces) for m in tri_scene.geometry.values() if isinstance(m, trimesh.Trimesh))
+    after = sum(len(m.faces) for m in lod.geometry.values() if isinstance(m, trimesh.Trimesh))
+    print(f"🔻 LOD: {before} → {after} faces")
+    if lod_cache is not None:
+        try:
+            lod_cache.store(model_file, lod, variant)
+        except Exception as e:
+            print(f"⚠️ Could not save LOD: {e}")
+    return lod
+
+def prepare_model(model_file, args):
+    budget = lod_face_budget(args)
+    with timed("load model"):
+        if budget is not None:
+            tri_scene = load_lod_scene(model_file, budget, args)
+        else:
+            tri_scene = load_scene(model_file, open_scene_cache(args))
     center = tri_scene.centroid
     scale = np.linalg.norm(tri_scene.extents)
-    width, height = args.size
 
     if args.info:
-        try:
-            import tabulate
-        except ImportError:
-            print("The 'tabulate' module is required for --info output. Install it with: pip install tabulate")
-            sys.exit(1)
-        print_scene_info(tri_scene)
+        if model_file.lower().endswith(".glb"):
+            print_glb_info(model_file)
+        elif budget is not None:
+            # 表示するのは元のモデルの面数・頂点数（LOD はプレビュー用に間引いたもの）
+            print_scene_info(load_scene(model_file, open_scene_cache(args)))
+        else:
+            print_scene_info(tri_scene)
+
+    with timed("build pyrender scene"):
+        scene = pyrender.Scene.from_trimesh_scene(tri_scene, bg_color=[0.5, 0.5, 0.5, 1.0])
+    return scene, center, scale
+
+def produces_output(args):
+    # 画像・アニメーション・データセットのどれかをファイルに書き出すか
+    return bool(args.output or args.animate or args.dataset)
+
+def wants_buffers(args):
+    return bool(args.depth or args.mask or args.normals)
+
+def depth_to_normals(depth, yfov=CAMERA_YFOV):
+    # 深度画像を視点座標の点群に戻し、隣接画素との差分の外積から法線（カメラ座標系、手前向きが +z）を求める
+    height, width = depth.shape
+    f = (height / 2.0) / math.tan(yfov / 2.0)
+    u = (np.arange(width, dtype=np.float32) + 0.5 - width / 2.0) / f
+    v = (np.arange(height, dtype=np.float32) + 0.5 - height / 2.0) / f
+    points = np.stack([u[None, :] * depth, -v[:, None] * depth, -depth], axis=-1)
+    normals = np.cross(np.gradient(points, axis=0), np.gradient(points, axis=1))
+    length = np.linalg.norm(normals, axis=-1, keepdims=True)
+    normals = np.divide(normals, length, out=np.zeros_like(normals), where=length > 0)
+    normals[depth <= 0] = 0.0
+    return normals
+
+def save_buffers(base, depth, args):
+    # 深度・マスク・法線を、カラー画像と同じ描画の深度バッファから書き出す（タイル画像はタイルごとに法線を計算）
+    written = []
+    with timed("save buffers"):
+        if args.depth == "npy":
+            np.save(base + "_depth.npy", depth)
+            written.append(base + "_depth.npy")
+        elif args.depth == "png":
+            # 16bit PNG（値 = 深度 × --depth-scale、背景は 0）。65535 を超える深度は飽和するので、そのときは警告する
+            scaled = np.rint(depth * args.depth_scale)
+            clipped = np.count_nonzero(scaled > 65535)
+            if clipped:
+                print(f"⚠️ {base}_depth.png: {clipped} pixels are farther than {65535 / args.depth_scale:g} units "
+                      f"and were clipped to 65535 (lower --depth-scale; farthest {depth.max():g})")
+            Image.fromarray(np.clip(scaled, 0, 65535).astype(np.uint16)).save(base + "_depth.png")
+            written.append(base + "_depth.png")
+        if args.mask:
+            Image.fromarray((depth > 0).astype(np.uint8) * 255).save(base + "_mask.png")
+            written.append(base + "_mask.png")
+        if args.normals:
+            width, height = args.size
+            normals = np.zeros(depth.shape + (3,), dtype=np.float32)
+            for top in range(0, depth.shape[0], height):
+                for left in range(0, depth.shape[1], width):
+                    tile = (slice(top, top + height), slice(left, left + width))
+                    normals[tile] = depth_to_normals(depth[tile])
+            rgb = np.where((depth > 0)[..., None], np.rint((normals * 0.5 + 0.5) * 255), 0).astype(np.uint8)
+            Image.fromarray(rgb).save(base + "_normal.png")
+            written.append(base + "_normal.png")
+    return written
+
+def render_model(session, model_file, args, prepared=None, encoder=None):
+    # (画像, 出力名のラベル, 深度) を返す。深度は --depth / --mask / --normals のときだけ（それ以外は None）
+    scene, center, scale = prepared if prepared is not None else prepare_model(model_file, args)
+    width, height = args.size
 
     intensity = args.light_intensity if args.light_intensity is not None else scale * 10.0
     if args.light_intensity is None:
         print(f"💡 Auto-set light intensity to {intensity:.1f} based on model scale")
 
-    scene = pyrender.Scene.from_trimesh_scene(tri_scene, bg_color=[0.5, 0.5, 0.5, 1.0])
+    session.resize(width, height)
+    session.set_scene(scene, intensity)
 
-    if args.cam_xyz is not None or args.distance is not None or args.angle is not None:
-        if args.distance is not None and args.angle is None:
-            args.angle = np.random.uniform(0, 360)
-            print(f"🎯 Random angle assigned: {args.angle:.1f}°")
-        if args.angle is not None and args.distance is None:
-            args.distance = scale * 2.0
-            print(f"📏 Auto-set distance: {args.distance:.2f}")
-        eye = args.cam_xyz if args.cam_xyz is not None else spherical_camera_position(center, args.distance, args.angle)
+    if args.dataset:
+        render_dataset(session, center, scale, model_file, args, encoder)
+        return None, "dataset", None
+    elif args.animate:
+        render_animation(session, center, scale, model_file, args, encoder)
+        return None, "anim", None
+    elif args.cam_xyz is not None or args.distance is not None or args.angle is not None:
+        angle = args.angle
+        distance = args.distance
+        if distance is not None and angle is None:
+            angle = np.random.uniform(0, 360)
+            print(f"🎯 Random angle assigned: {angle:.1f}°")
+        if angle is not None and distance is None:
+            distance = scale * 2.0
+            print(f"📏 Auto-set distance: {distance:.2f}")
+        eye = args.cam_xyz if args.cam_xyz is not None else spherical_camera_position(center, distance, angle)
         view = look_at_view_matrix(eye, center)
         camera_pose = np.linalg.inv(view)
-        img = render_image(scene, camera_pose, width, height, intensity)
+        color, depth = session.render_buffers(camera_pose)
+        img = Image.fromarray(color, mode="RGBA")
+        label = "xyz" if args.cam_xyz is not None else f"{angle:g}"
     else:
-        angles = [0, 90, 180, 270]
-        images = []
-        for ang in angles:
+        cols, rows = turntable_grid(args)
+        # 全ビューを1枚のキャンバス上のタイルへ直接書き込む（未使用のタイルは透明）
+        # 深度は --depth / --mask / --normals のときだけキャンバス全体分を確保する
+        canvas = np.zeros((rows * height, cols * width, 4), dtype=np.uint8)
+        depth = np.zeros((rows * height, cols * width), dtype=np.float32) if wants_buffers(args) else None
+        for i, ang in enumerate(np.linspace(0.0, 360.0, args.views, endpoint=False)):
             eye = spherical_camera_position(center, scale * 2.0, ang)
             view = look_at_view_matrix(eye, center)
             pose = np.linalg.inv(view)
-            img_piece = render_image(scene, pose, width, height, intensity)
-            images.append(img_piece)
-        img = Image.new("RGBA", (width * 4, height))
-        for i, piece in enumerate(images):
-            img.paste(piece, (i * width, 0))
+            row, col = divmod(i, cols)
+            tile = (slice(row * height, (row + 1) * height), slice(col * width, (col + 1) * width))
+            if depth is not None:
+                canvas[tile], depth[tile] = session.render_buffers(pose)
+            else:
+                canvas[tile] = session.render_array(pose)
+        img = Image.fromarray(canvas, mode="RGBA")
+        label = "turntable"
+    return img, label, depth if wants_buffers(args) else None
+
+def webp_options(args):
+    return {"quality": args.quality, "method": args.method, "lossless": args.lossless}
+
+class ImageEncoder:
+    # 画像の書き出し（WebP / PNG の圧縮）をバックグラウンドのスレッドで行い、その間に次のビュー・次のモデルを描画する。
+    # 書き出し待ちが queue_depth 件に達すると submit() が空きを待つ（描画が先行しすぎてメモリを使い切らないように）。
+    # threads=0 のときは submit() の中でその場で書き出す。
+    def __init__(self, threads, queue_depth):
+        self.executor = None
+        if threads > 0:
+            import concurrent.futures
+            self.executor = concurrent.futures.ThreadPoolExecutor(threads, thread_name_prefix="encode")
+        self.slots = threading.BoundedSemaphore(max(1, queue_depth))
+        self.pending = collections.defaultdict(list)
+
+    def submit(self, key, fn, *args):
+        import concurrent.futures
+        if self.executor is None:
+            future = concurrent.futures.Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            self.slots.acquire()
+            future = self.executor.submit(fn, *args)
+            future.add_done_callback(lambda _: self.slots.release())
+        self.pending[key].append(future)
+
+    def finish(self, result):
+        # そのモデルの書き出しが全部終わるまで待ってメッセージを表示し、失敗していれば結果をエラーにする
+        model_file, seconds, error, img = result
+        for future in self.pending.pop(model_file, []):
+            try:
+                message = future.result()
+            except Exception as e:
+                if error is None:
+                    print(f"❌ {model_file}: {e}")
+                    error = str(e)
+                continue
+            if message:
+                print(message)
+        return model_file, seconds, error, img
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
 
+def save_image(img, out, options):
+    with timed("encode + save"):
+        img.save(out, **options)
+    return f"Image saved: {out}"
+
+def save_buffers_message(base, depth, args):
+    return "Buffers saved: " + ", ".join(save_buffers(base, depth, args))
+
+def process_model(session, model_file, args, keep_image, encoder=None):
+    # encoder を渡すと画像の書き出しはその中で進み、完了待ちとエラーの反映は呼び出し側の encoder.finish() で行う
+    own_encoder = encoder is None
+    if own_encoder:
+        encoder = ImageEncoder(0, 1)
+    start = time.perf_counter()
+    try:
+        img, label, depth = render_model(session, model_file, args, encoder=encoder)
+        if img is not None and args.output:
+            out = format_output_path(args.output, model_file, label)
+            encoder.submit(model_file, save_image, img, out, webp_options(args))
+            if depth is not None:
+                encoder.submit(model_file, save_buffers_message, os.path.splitext(out)[0], depth, args)
+        result = model_file, time.perf_counter() - start, None, img if keep_image else None
+    except Exception as e:
+        print(f"❌ {model_file}: {e}")
+        result = model_file, time.perf_counter() - start, str(e), None
+    return encoder.finish(result) if own_encoder else result
+
+SIXEL_MAX_WIDTH = 1024
+
+def preview_image(img, viewer="auto"):
+    # 一時ファイルを作らずにターミナルへ表示する（timg へは標準入力で渡す）
+    if viewer == "auto":
+        viewer = "timg" if shutil.which("timg") else "sixel"
+    if viewer == "timg":
+        buf = io.BytesIO()
+        img.save(buf, format="PNG", compress_level=1)
+        try:
+            subprocess.run(["timg", "-"], input=buf.getvalue())
+            return
+        except OSError as e:
+            # timg が無い・起動できないときはバッチを止めず、内蔵の Sixel エンコーダで表示する
+            print(f"⚠️ timg could not be started ({e}); falling back to sixel preview")
+    import sixel
+    if img.width > SIXEL_MAX_WIDTH:
+        img = img.resize((SIXEL_MAX_WIDTH, max(1, img.height * SIXEL_MAX_WIDTH // img.width)), Image.BILINEAR)
+    sys.stdout.flush()
+    sys.stdout.buffer.write(sixel.encode(np.asarray(img.convert("RGB"))) + b"\n")
+    sys.stdout.buffer.flush()
+
+# --jobs 用ワーカー：プロセスごとに専用の RenderSession（GLコンテキスト）を持つ
+_worker_session = None
+_worker_args = None
+
+def _init_worker(args):
+    global _worker_args
+    _worker_args = args
+
+def _render_worker(model_file):
+    global _worker_session
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        print(f"\n📦 {model_file}")
+        try:
+            if _worker_session is None:
+                width, height = _worker_args.size
+                _worker_session = RenderSession(width, height, measure_stages(_worker_args))
+        except Exception as e:
+            print(f"❌ {model_file}: {e}")
+            return log.getvalue(), (model_file, 0.0, str(e), None), pop_worker_stats()
+        result = process_model(_worker_session, model_file, _worker_args, not _worker_args.no_view)
+    return log.getvalue(), result, pop_worker_stats()
+
+def pop_worker_stats():
+    # ワーカーでの計測結果を親プロセスへ送り、次のモデルの分と重複しないよう空にする
+    stages, counters = TIMINGS[:], dict(COUNTERS)
+    TIMINGS.clear()
+    COUNTERS.clear()
+    return stages, counters
+
+def run_parallel(model_files, args):
+    if setup_gl_platform() == "osmesa":
+        # llvmpipe のスレッドとワーカープロセスが CPU を奪い合わないようにする
+        os.environ.setdefault("LP_NUM_THREADS", "1")
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(args.jobs, initializer=_init_worker, initargs=(args,)) as pool:
+        for log, result, (stages, counters) in pool.imap(_render_worker, model_files):
+            TIMINGS.extend(Stage(*stage) for stage in stages)
+            COUNTERS.update(counters)
+            yield log, result
+
+def run_sequential(model_files, args):
+    width, height = args.size
+    session = RenderSession(width, height, measure_stages(args))
+    encoder = ImageEncoder(args.encode_threads, args.encode_queue)
+    pending = collections.deque()
+    try:
+        for model_file in model_files:
+            if len(model_files) > 1:
+                print(f"\n📦 {model_file}")
+            pending.append(process_model(session, model_file, args, not args.no_view, encoder))
+            # 1つ前のモデルの書き出しは、このモデルを描画している間に進んでいる
+            while len(pending) > 1:
+                yield "", encoder.finish(pending.popleft())
+        while pending:
+            yield "", encoder.finish(pending.popleft())
+    finally:
+        encoder.close()
+        session.close()
+
+def save_frame(color, depth, base, args):
+    with timed("encode + save"):
+        Image.fromarray(color, mode="RGBA").save(base + ".png")
+    if wants_buffers(args):
+        save_buffers(base, depth, args)
+
+def render_animation(session, center, scale, model_file, args, encoder):
+    distance = args.distance if args.distance is not None else scale * 2.0
+    start_angle = args.angle if args.angle is not None else 0.0
+    angles = start_angle + np.linspace(0.0, 360.0, args.animate, endpoint=False)
+    stem = os.path.splitext(os.path.basename(model_file))[0]
+    frames_dir = args.frames_dir.format(stem=stem) if args.frames_dir else None
+    if frames_dir:
+        os.makedirs(frames_dir, exist_ok=True)
+
+    saved = set()
+
+    def render_frame(i):
+        eye = spherical_camera_position(center, distance, angles[i])
+        color, depth = session.render_buffers(np.linalg.inv(look_at_view_matrix(eye, center)))
+        # 同じフレームを2つの書き出しスレッドが同時に書かないよう、連番PNGは各フレーム1回だけ
+        if frames_dir and i not in saved:
+            saved.add(i)
+            encoder.submit(model_file, save_frame, color, depth, os.path.join(frames_dir, f"{i:04d}"), args)
+        return color
+
+    # フレームはレンダリングした端から書き出し、リストには溜めない
     if args.output:
-        out = args.output if args.output.lower().endswith(".webp") else args.output + ".webp"
-        img.save(out)
-        print("Image saved:", out)
-
-    if show_view:
-        tmpfile = "_tmp_render.webp"
-        img.save(tmpfile)
-        os.system(f"timg {tmpfile}")
-        os.remove(tmpfile)
-    elif not args.output:
-        print("⚠️ No output or view specified. Use --output or omit --no-view to preview.")
-
-    if temp_file and os.path.exists(temp_file):
-        os.remove(temp_file)
+        out = format_output_path(args.output, model_file, "anim")
+        orbit_frames_class()(render_frame, args.animate).save(out, save_all=True, duration=1000.0 / args.fps, loop=0,
+                                                              **webp_options(args))
+        print(f"Animation saved: {out} ({args.animate} frames)")
+    else:
+        for i in range(args.animate):
+            render_frame(i)
+    if frames_dir:
+        # 連番PNGの書き出しが全部終わってから表示されるよう、メッセージも同じキューに積む
+        message = f"Frames saved: {frames_dir}/0000.png ... {args.animate - 1:04d}.png"
+        encoder.submit(model_file, lambda: message)
+
+def dataset_camera_poses(center, scale, args):
+    distance = args.distance if args.distance is not None else scale * 2.0
+    if args.cameras == "orbit":
+        start_angle = args.angle if args.angle is not None else 0.0
+        eyes = orbit_camera_positions(center, distance, start_angle + np.linspace(0.0, 360.0, args.dataset_views, endpoint=False))
+    elif args.cameras == "sphere":
+        eyes = fibonacci_camera_positions(center, distance, args.dataset_views)
+    else:
+        eyes = load_camera_file(args.cameras)
+        if eyes.ndim == 3:
+            return eyes
+    return look_at_poses(eyes, center)
+
+def camera_intrinsics(width, height, yfov=CAMERA_YFOV):
+    # pyrender の PerspectiveCamera（縦の画角 yfov、正方画素、主点は画像中心）に対応する値
+    fl = (height / 2.0) / math.tan(yfov / 2.0)
+    return {
+        "camera_angle_x": 2.0 * math.atan(width / (2.0 * fl)),
+        "camera_angle_y": yfov,
+        "fl_x": fl, "fl_y": fl, "cx": width / 2.0, "cy": height / 2.0, "w": width, "h": height,
+    }
+
+def render_dataset(session, center, scale, model_file, args, encoder):
+    # 学習用の多視点データセット：images/NNNN.png（＋深度・マスク・法線）と transforms.json（NeRF / instant-ngp 形式）
+    stem = os.path.splitext(os.path.basename(model_file))[0]
+    dataset_dir = args.dataset.format(stem=stem)
+    os.makedirs(os.path.join(dataset_dir, "images"), exist_ok=True)
+    with timed("camera poses"):
+        poses = dataset_camera_poses(center, scale, args)
+
+    width, height = args.size
+    meta = camera_intrinsics(width, height)
+    if args.depth == "png":
+        meta["depth_unit_scale_factor"] = 1.0 / args.depth_scale
+    frames = []
+    for i, pose in enumerate(poses):
+        name = f"images/{i:04d}"
+        color, depth = session.render_buffers(pose)
+        # 画像は描画した端からバックグラウンドで書き出し、メモリには溜めない
+        encoder.submit(model_file, save_frame, color, depth, os.path.join(dataset_dir, name), args)
+        frame = {"file_path": name + ".png", "transform_matrix": pose.tolist()}
+        if args.depth:
+            frame["depth_file_path"] = f"{name}_depth.{args.depth}"
+        if args.mask:
+            frame["mask_path"] = name + "_mask.png"
+        if args.normals:
+            frame["normal_file_path"] = name + "_normal.png"
+        frames.append(frame)
+
+    path = os.path.join(dataset_dir, "transforms.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump({**meta, "frames": frames}, f, indent=2)
+    os.replace(path + ".tmp", path)
+    message = f"Dataset saved: {dataset_dir} ({len(frames)} views, transforms.json)"
+    encoder.submit(model_file, lambda: message)
+
+# ---- サーバーモード（--serve） ----
+# レンダラとシーンを常駐させ、HTTP（TCP または Unix ドメインソケット）でレンダリング要求を受け付ける。
+# 要求は --jobs 個のワーカープロセス（各自が GL コンテキストを1つ持つ）のキューに積まれる。
+SERVE_FORMATS = {"webp": ("WEBP", "image/webp"), "png": ("PNG", "image/png")}
+# 1回の要求でワーカーを長時間占有しない・メモリを使い切らないための上限（超えた要求は 400 で断る）
+# （キャンバスは列数 x 行数 x 幅 x 高さなので、サイズとタイル数を別々にではなく合計の画素数で制限する）
+SERVE_MAX_VIEWS = 64
+SERVE_MAX_CANVAS_PIXELS = 8192 * 8192
+
+_serve_scenes = None
+
+def _init_serve_worker(args):
+    global _serve_scenes
+    _init_worker(args)
+    _serve_scenes = collections.OrderedDict()
+
+def _serve_worker(model_file, overrides):
+    global _worker_session
+    args = argparse.Namespace(**{**vars(_worker_args), **overrides})
+    with contextlib.redirect_stdout(sys.stderr):
+        st = os.stat(model_file)
+        # --lod auto の面数は要求ごとの size で変わるので、LOD の予算もキーに含める
+        key = (os.path.abspath(model_file), st.st_mtime_ns, st.st_size, lod_face_budget(args))
+        prepared = _serve_scenes.pop(key, None)
+        if prepared is None:
+            prepared = prepare_model(model_file, args)
+        _serve_scenes[key] = prepared
+        while len(_serve_scenes) > args.keep_scenes:
+            _serve_scenes.popitem(last=False)
+        if _worker_session is None:
+            _worker_session = RenderSession(*args.size, measure_stages(args))
+        img, _, _ = render_model(_worker_session, model_file, args, prepared)
+    image_format, _ = SERVE_FORMATS[overrides["format"]]
+    buf = io.BytesIO()
+    img.save(buf, format=image_format, **(webp_options(args) if image_format == "WEBP" else {}))
+    return buf.getvalue()
+
+def parse_render_request(params, default_size=(512, 512)):
+    # クエリ / JSON のパラメータを検証し、CLI 引数に対応する上書き値へ変換する
+    def get(name):
+        value = params.get(name)
+        return value[0] if isinstance(value, list) else value
+
+    model_file = get("model")
+    if not model_file:
+        raise ValueError("'model' is required")
+    if not isinstance(model_file, str):
+        raise ValueError("'model' must be a path string")
+    if not os.path.isfile(model_file):
+        raise ValueError(f"File not found: {model_file}")
+    overrides = {"angle": None, "distance": None, "cam_xyz": None, "views": 4, "grid": None,
+                 "light_intensity": None, "format": "webp", "animate": None, "output": None, "info": False,
+                 "depth": None, "mask": False, "normals": False, "dataset": None}
+    try:
+        if get("angle") is not None:
+            overrides["angle"] = float(get("angle"))
+        if get("distance") is not None:
+            overrides["distance"] = float(get("distance"))
+        if get("cam_xyz") is not None:
+            overrides["cam_xyz"] = parse_xyz(str(get("cam_xyz")))
+        if get("size") is not None:
+            overrides["size"] = parse_size(str(get("size")))
+        if get("views") is not None:
+            overrides["views"] = int(get("views"))
+        if get("grid") is not None:
+            overrides["grid"] = parse_grid(str(get("grid")))
+        if get("light_intensity") is not None:
+            overrides["light_intensity"] = float(get("light_intensity"))
+    except (ValueError, argparse.ArgumentTypeError) as e:
+        raise ValueError(str(e))
+    if get("format") is not None:
+        overrides["format"] = str(get("format")).lower()
+    if overrides["format"] not in SERVE_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(SERVE_FORMATS)}")
+    if overrides["cam_xyz"] is not None and overrides["distance"] is not None:
+        raise ValueError("'cam_xyz' and 'distance' are mutually exclusive")
+    if overrides["views"] < 1:
+        raise ValueError("'views' must be >= 1")
+    if overrides["views"] > SERVE_MAX_VIEWS:
+        raise ValueError(f"'views' must be <= {SERVE_MAX_VIEWS}")
+    width, height = overrides.get("size", default_size)
+    if width < 1 or height < 1:
+        raise ValueError("'size' must be at least 1x1")
+    grid = overrides["grid"]
+    if grid is not None and grid[0] * grid[1] < overrides["views"]:
+        raise ValueError("'grid' has fewer tiles than 'views'")
+    single = any(overrides[name] is not None for name in ("angle", "distance", "cam_xyz"))
+    cols, rows = (1, 1) if single else turntable_grid(argparse.Namespace(**overrides))
+    if cols * rows * width * height > SERVE_MAX_CANVAS_PIXELS:
+        raise ValueError(f"image must be at most {SERVE_MAX_CANVAS_PIXELS} pixels in total "
+                         f"({cols}x{rows} tiles of {width}x{height} requested)")
+    if overrides["format"] == "webp" and max(cols * width, rows * height) > WEBP_MAX_DIMENSION:
+        raise ValueError(f"webp images must be at most {WEBP_MAX_DIMENSION} px per side")
+    return model_file, overrides
+
+@functools.lru_cache(maxsize=None)
+def server_classes():
+    # http.server は --serve のときだけ import する
+    import http.server
+    import socketserver
+
+    class RenderRequestHandler(http.server.BaseHTTPRequestHandler):
+        # GET /render?model=PATH&angle=..  または  POST /render（JSON ボディ）
+        def do_GET(self):
+            url = urllib.parse.urlsplit(self.path)
+            if url.path == "/health":
+                self.send_body(200, b"ok\n", "text/plain")
+            elif url.path == "/render":
+                self.handle_render(urllib.parse.parse_qs(url.query))
+            else:
+                self.send_body(404, b"not found\n", "text/plain")
+
+        def do_POST(self):
+            if urllib.parse.urlsplit(self.path).path != "/render":
+                self.send_body(404, b"not found\n", "text/plain")
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                params = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(params, dict):
+                    raise ValueError
+            except ValueError:
+                self.send_body(400, b"request body must be a JSON object\n", "text/plain")
+                return
+            self.handle_render(params)
+
+        def handle_render(self, params):
+            try:
+                model_file, overrides = parse_render_request(params, self.server.default_size)
+            except ValueError as e:
+                self.send_body(400, f"{e}\n".encode("utf-8"), "text/plain")
+                return
+            try:
+                data = self.server.pool.apply(_serve_worker, (model_file, overrides))
+            except Exception as e:
+                self.send_body(500, f"render failed: {e}\n".encode("utf-8"), "text/plain")
+                return
+            self.send_body(200, data, SERVE_FORMATS[overrides["format"]][1])
+
+        def send_body(self, status, body, content_type):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def address_string(self):
+            # Unix ドメインソケットではクライアントアドレスが空になる
+            return self.client_address[0] if self.client_address else "unix"
+
+    class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    return RenderRequestHandler, UnixHTTPServer
+
+def make_server(address):
+    import http.server
+    handler, unix_server = server_classes()
+    if address.startswith("unix:") or "/" in address:
+        path = address[len("unix:"):] if address.startswith("unix:") else address
+        # 前回の実行で残ったソケットだけを消す（通常のファイルなどは消さずに止める）
+        if os.path.lexists(path):
+            if not stat.S_ISSOCK(os.lstat(path).st_mode):
+                print(f"❌ --serve: {path} exists and is not a socket")
+                sys.exit(1)
+            os.remove(path)
+        return unix_server(path, handler), f"unix:{path}"
+    host, _, port = address.rpartition(":")
+    host = host or "127.0.0.1"
+    return http.server.ThreadingHTTPServer((host, int(port)), handler), f"http://{host}:{port}"
+
+def run_server(args):
+    if setup_gl_platform() == "osmesa" and args.jobs > 1:
+        os.environ.setdefault("LP_NUM_THREADS", "1")
+    ctx = multiprocessing.get_context("spawn")
+    server, location = make_server(args.serve)
+    with ctx.Pool(args.jobs, initializer=_init_serve_worker, initargs=(args,)) as pool:
+        server.pool = pool
+        server.default_size = args.size
+        print(f"🚀 Serving on {location} with {args.jobs} render context(s) (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if isinstance(server.server_address, str) and os.path.exists(server.server_address):
+                os.remove(server.server_address)
+
+def print_batch_summary(results, elapsed):
+    failed = [r for r in results if r[2] is not None]
+    print(f"\n⏱️ Batch summary: {len(results)} models, {len(results) - len(failed)} ok, {len(failed)} failed, {elapsed:.2f} s total")
+    for model_file, seconds, error in results:
+        status = "OK" if error is None else "FAILED"
+        line = f"  {status:<6} {seconds:8.2f} s  {model_file}"
+        if error is not None:
+            line += f"  ({error})"
+        print(line)
+
+def measure_stages(args):
+    return bool(args.timings or args.profile)
+
+def report_stages(args):
+    if args.timings:
+        print_timings()
+    if args.profile:
+        print_profile()
+    if args.trace:
+        write_trace(args.trace)
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a 3D model to a still image")
+    parser.add_argument("model_files", nargs="*", metavar="model_file",
+                        help="3D model files (.obj or .glb), directories or glob patterns")
+    parser.add_argument("--manifest", type=str, help="Text file listing model paths (one per line)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--distance", type=float, help="Distance from model center (spherical)")
+    group.add_argument("--cam-xyz", type=parse_xyz, help="Camera position x,y,z")
+    parser.add_argument("--angle", type=float, help="Azimuth angle (degrees)")
+    parser.add_argument("--output", type=str,
+                        help="Output file (.webp). Accepts {stem} and {angle} placeholders, e.g. {stem}_{angle}.webp")
+    parser.add_argument("--views", type=int, default=4, help="Number of turntable views when no camera is given (default: 4)")
+    parser.add_argument("--grid", type=parse_grid, help="Tile layout COLSxROWS for turntable views (default: near-square)")
+    parser.add_argument("--animate", type=int, metavar="FRAMES", help="Render an orbit animation with FRAMES frames (animated WebP via --output)")
+    parser.add_argument("--fps", type=float, default=30.0, help="Animation frame rate (default: 30)")
+    parser.add_argument("--frames-dir", type=str, help="Also write animation frames as numbered PNGs into this directory ({stem} allowed)")
+    parser.add_argument("--dataset", type=str, metavar="DIR",
+                        help="Render a multi-view training dataset into DIR: images/NNNN.png plus transforms.json "
+                             "with intrinsics and camera-to-world poses ({stem} allowed)")
+    parser.add_argument("--cameras", type=str, default="sphere",
+                        help="Dataset cameras: orbit, sphere (Fibonacci) or a file of x,y,z positions / "
+                             "4x4 poses / transforms.json (default: sphere)")
+    parser.add_argument("--dataset-views", type=int, default=100,
+                        help="Number of dataset views for orbit / sphere cameras (default: 100)")
+    parser.add_argument("--depth", choices=["npy", "png"],
+                        help="Also write the depth buffer next to the image: float32 .npy or 16-bit PNG (see --depth-scale)")
+    parser.add_argument("--depth-scale", type=float, default=1000.0,
+                        help="Depth units per model unit for 16-bit PNG depth (default: 1000; depths beyond 65535 / scale are clipped with a warning)")
+    parser.add_argument("--mask", action="store_true", help="Also write the object mask (PNG) next to the image")
+    parser.add_argument("--normals", action="store_true", help="Also write camera-space normals (RGB PNG) next to the image")
+    parser.add_argument("--quality", type=float, default=80, help="WebP quality 0-100; effort when --lossless (default: 80)")
+    parser.add_argument("--method", type=int, default=4, choices=range(7), metavar="0-6",
+                        help="WebP encoder method, 0 = fastest, 6 = smallest (default: 4)")
+    parser.add_argument("--lossless", action="store_true", help="Encode WebP losslessly")
+    parser.add_argument("--encode-threads", type=int, default=2,
+                        help="Background threads that encode and write images while the next view renders; 0 = inline (default: 2)")
+    parser.add_argument("--encode-queue", type=int, default=4,
+                        help="Maximum images waiting to be encoded before rendering blocks (default: 4)")
+    parser.add_argument("--no-view", action="store_true", help="Disable timg preview (default is ON)")
+    parser.add_argument("--viewer", choices=["auto", "timg", "sixel"], default="auto",
+                        help="Preview method: timg via stdin, or the built-in Sixel encoder (default: auto = timg if installed)")
+    parser.add_argument("--info", action="store_true", help="Display model information")
+    parser.add_argument("--size", type=parse_size, default=(512, 512), help="Output size WIDTHxHEIGHT (default: 512x512)")
+    parser.add_argument("--light-intensity", type=float, help="Light intensity (auto if omitted)")
+    parser.add_argument("--lod", type=parse_lod, default="off",
+                        help="Decimate for preview: off, auto (budget from --size) or a face count (default: off)")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the parsed-model cache")
+    parser.add_argument("--cache-dir", type=str, help="Parsed-model cache directory (default: ~/.cache/ezrender)")
+    parser.add_argument("--cache-size", type=float, default=4096, help="Parsed-model cache size limit in MB (default: 4096)")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Number of worker processes / render contexts (default: 1)")
+    parser.add_argument("--serve", type=str, metavar="ADDR",
+                        help="Run as a render server on [HOST:]PORT or a Unix socket path (unix:PATH)")
+    parser.add_argument("--timings", action="store_true", help="Report startup / load / render timings")
+    parser.add_argument("--profile", action="store_true",
+                        help="Report wall time and stage-thread CPU time per stage, process peak RSS, "
+                             "uploaded triangles / textures")
+    parser.add_argument("--trace", type=str, metavar="FILE",
+                        help="Write all stages as Chrome trace-event JSON (chrome://tracing, Perfetto); implies --profile")
+    parser.add_argument("--keep-scenes", type=int, default=4, help="Scenes kept resident per server worker (default: 4)")
+
+    args = parser.parse_args()
+    record_stage("startup (imports + args)", _START, _START_THREAD_CPU)
+    if args.trace:
+        args.profile = True
+
+    if args.jobs < 1:
+        parser.error("--jobs must be >= 1")
+    if args.encode_threads < 0 or args.encode_queue < 1:
+        parser.error("--encode-threads must be >= 0 and --encode-queue >= 1")
+    if not 0 <= args.quality <= 100:
+        parser.error("--quality must be between 0 and 100")
+    if args.serve:
+        if args.model_files or args.manifest:
+            parser.error("--serve does not take model files; send them with each request")
+        run_server(args)
+        return
+
+    model_files = expand_model_paths(args.model_files, args.manifest)
+    if not model_files:
+        parser.error("no model files given")
+    batch = len(model_files) > 1
+    if args.dataset:
+        if args.animate is not None or args.cam_xyz is not None:
+            parser.error("--dataset cannot be combined with --animate or --cam-xyz")
+        if args.dataset_views < 1:
+            parser.error("--dataset-views must be >= 1")
+        if args.cameras not in ("orbit", "sphere") and not os.path.isfile(args.cameras):
+            parser.error(f"--cameras: file not found: {args.cameras}")
+        if batch and "{stem}" not in args.dataset:
+            parser.error("--dataset must contain {stem} when rendering multiple models")
+    if args.animate is not None:
+        if args.animate < 1:
+            parser.error("--animate must be >= 1")
+        if args.cam_xyz is not None:
+            parser.error("--animate cannot be combined with --cam-xyz")
+        if not args.output and not args.frames_dir:
+            parser.error("--animate requires --output and/or --frames-dir")
+        if batch and args.frames_dir and "{stem}" not in args.frames_dir:
+            parser.error("--frames-dir must contain {stem} when rendering multiple models")
+    if wants_buffers(args) and not args.dataset:
+        if args.animate is not None and not args.frames_dir:
+            parser.error("--depth/--mask/--normals with --animate are written per frame and require --frames-dir")
+        if args.animate is None and not args.output:
+            parser.error("--depth/--mask/--normals require --output")
+    if args.views < 1:
+        parser.error("--views must be >= 1")
+    if args.grid is not None and args.grid[0] * args.grid[1] < args.views:
+        parser.error(f"--grid {args.grid[0]}x{args.grid[1]} has fewer tiles than --views {args.views}")
+    turntable = args.cam_xyz is None and args.distance is None and args.angle is None
+    if args.output and turntable and not args.animate and not args.dataset:
+        cols, rows = turntable_grid(args)
+        if max(cols * args.size[0], rows * args.size[1]) > WEBP_MAX_DIMENSION:
+            parser.error(f"{cols}x{rows} tiles of {args.size[0]}x{args.size[1]} make a "
+                         f"{cols * args.size[0]}x{rows * args.size[1]} sheet; WebP allows at most "
+                         f"{WEBP_MAX_DIMENSION} px per side (use --grid or a smaller --size)")
+    if batch and args.output and "{stem}" not in args.output:
+        parser.error("--output must contain {stem} when rendering multiple models (e.g. {stem}_{angle}.webp)")
+
+    if args.info:
+        try:
+            import tabulate
+        except ImportError:
+            print("The 'tabulate' module is required for --info output. Install it with: pip install tabulate")
+            sys.exit(1)
+
+    # 描画も保存も不要な --info だけの実行では OpenGL を一切初期化しない
+    if args.info and args.no_view and not produces_output(args):
+        failed = False
+        cache = open_scene_cache(args)
+        for model_file in model_files:
+            if batch:
+                print(f"\n📦 {model_file}")
+            try:
+                if model_file.lower().endswith(".glb"):
+                    with timed("read GLB header"):
+                        print_glb_info(model_file)
+                    continue
+                with timed("load model"):
+                    tri_scene = load_scene(model_file, cache)
+                print_scene_info(tri_scene)
+            except Exception as e:
+                print(f"❌ {model_file}: {e}")
+                failed = True
+        report_stages(args)
+        if failed:
+            sys.exit(1)
+        return
+
+    print(f"🖥️ OpenGL platform: {setup_gl_platform()}" + (f", {args.jobs} workers" if args.jobs > 1 else ""))
+    results = []
+    batch_start = time.perf_counter()
+    runner = run_parallel if args.jobs > 1 and batch else run_sequential
+    for log, (model_file, seconds, error, img) in runner(model_files, args):
+        print(log, end="")
+        if img is not None:
+            with timed("preview"):
+                preview_image(img, args.viewer)
+        elif error is None and args.no_view and not produces_output(args):
+            print("⚠️ No output or view specified. Use --output or omit --no-view to preview.")
+        results.append((model_file, seconds, error))
+
+    if batch:
+        print_batch_summary(results, time.perf_counter() - batch_start)
+    report_stages(args)
+    if any(error is not None for _, _, error in results):
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
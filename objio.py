@@ -0,0 +1,159 @@
+# 頂点カラー付きOBJ（`v x y z r g b` / `f a b c`）の高速ローダ。
+# ezrender.py と utils/e3d_objfix.py で共有しています。
+#
+# - ファイルを大きなバイト単位のチャンクで読み込み、
+#   行ごとの split() / float() を使わずに NumPy でまとめて数値化します
+# - `v` 行は 3成分（座標のみ）と 6成分（座標＋RGB）の混在に対応（カラーなしは白）
+# - `f` 行は `a`, `a/b`, `a//c`, `a/b/c` 形式と負のインデックスに対応し、
+#   4頂点以上の面は扇形に三角形分割します
+# - `vt` / `vn` / `mtllib` などその他の行は読み飛ばします（行頭の空白は無視）。
+#   plain_only=True のときは `vt` / `vn` / `usemtl` / `mtllib` 行を見つけた時点で OBJFeatureError を送出するので、
+#   呼び出し側はテクスチャや法線も読めるローダ（trimesh など）に切り替えられます
+# - `#` から行末まではコメントとして無視します（`v 0 0 0 # c` のような行末コメントも可）
+
+import numpy as np
+
+CHUNK_SIZE = 8 * 1024 * 1024
+
+_NL = ord("\n")
+_SPACE = ord(" ")
+_SLASH = ord("/")
+
+# このローダでは扱わない（読み飛ばすと見た目が変わる）行のキーワード
+FEATURE_KEYWORDS = (b"vt", b"vn", b"usemtl", b"mtllib")
+
+class OBJFeatureError(ValueError):
+    # plain_only=True で、頂点カラー以外の属性（UV・法線・マテリアル）を持つOBJを読もうとした
+    pass
+
+# 行頭（heads）が keyword で始まり、その後に空白か改行が続く行
+def _keyword_lines(data, heads, keyword):
+    k = np.frombuffer(keyword, dtype=np.uint8)
+    chars = data[np.minimum(heads[:, None] + np.arange(len(k) + 1), len(data) - 1)]
+    after = chars[:, len(k)]
+    return (chars[:, :len(k)] == k).all(axis=1) & ((after == _SPACE) | (after == _NL))
+
+# キーワードを除いた行（各行は改行で終わる）ごとのトークン数
+def _count_tokens(chars):
+    ws = (chars == _SPACE) | (chars == _NL)
+    token_start = ~ws
+    token_start[1:] &= ws[:-1]
+    ends = np.flatnonzero(chars == _NL)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    return np.add.reduceat(token_start, starts, dtype=np.int64)
+
+# 1チャンク（改行で終わるバイト列）から頂点・カラー・面を取り出す
+def _parse_chunk(buf, vertex_offset, dtype, plain_only=False):
+    # 末尾に番兵の改行を足し、CR/TAB は空白として扱う
+    data = np.frombuffer(buf + b"\n", dtype=np.uint8).copy()
+    data[(data == ord("\r")) | (data == ord("\t"))] = _SPACE
+    nl = data == _NL
+    comment = data == ord("#")
+    if comment.any():
+        # "#" から行末までのコメントを空白で潰す（"/b/c" を潰すのと同じ累積和の方法）
+        hashes = np.cumsum(comment, dtype=np.int32)
+        data[(hashes > np.maximum.accumulate(np.where(nl, hashes, 0))) & ~nl] = _SPACE
+
+    ends = np.flatnonzero(nl)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    lengths = ends - starts + 1
+    # 行頭の空白（インデント）は読み飛ばし、最初の空白でない文字でキーワードを判定する
+    heads = starts
+    if (data[starts] == _SPACE).any():
+        nonspace = np.where(data != _SPACE, np.arange(len(data)), len(data) - 1)
+        heads = np.minimum.accumulate(nonspace[::-1])[::-1][starts]
+    first = data[heads]
+    second = data[np.minimum(heads + 1, len(data) - 1)]
+    is_v = (first == ord("v")) & (second == _SPACE)
+    is_f = (first == ord("f")) & (second == _SPACE)
+    if plain_only:
+        for keyword in FEATURE_KEYWORDS:
+            if _keyword_lines(data, heads, keyword).any():
+                raise OBJFeatureError(f"OBJ に {keyword.decode()} 行があります")
+    # 行頭のキーワードは空白にしておく
+    data[heads[is_v | is_f]] = _SPACE
+
+    vertices = np.empty((0, 3), dtype=dtype)
+    colors = np.empty((0, 3), dtype=np.float32)
+    has_color = np.empty(0, dtype=bool)
+    if is_v.any():
+        chars = data[np.repeat(is_v, lengths)]
+        v_counts = _count_tokens(chars)
+        values = _fromstring(chars, np.float64, v_counts.sum())
+        offsets = np.cumsum(v_counts) - v_counts
+        vertices = values[offsets[:, None] + np.arange(3)].astype(dtype)
+        has_color = v_counts >= 6
+        colors = np.ones((len(v_counts), 3), dtype=np.float32)
+        colors[has_color] = values[offsets[has_color, None] + np.arange(3, 6)]
+
+    faces = np.empty((0, 3), dtype=np.int32)
+    if is_f.any():
+        chars = data[np.repeat(is_f, lengths)]
+        slash = chars == _SLASH
+        if slash.any():
+            # "a/b/c" の "/b/c" 部分を空白で潰し、頂点インデックスだけを残す
+            ws = (chars == _SPACE) | (chars == _NL)
+            slashes = np.cumsum(slash, dtype=np.int32)
+            chars[slashes > np.maximum.accumulate(np.where(ws, slashes, 0))] = _SPACE
+        f_counts = _count_tokens(chars)
+        values = _fromstring(chars, np.int64, f_counts.sum())
+        # 負のインデックスは、その行までに定義された頂点数からの相対位置
+        defined = vertex_offset + np.cumsum(is_v)[is_f]
+        defined = np.repeat(defined, f_counts)
+        index = np.where(values < 0, values + defined, values - 1)
+
+        if (f_counts == 3).all():
+            faces = index.reshape(-1, 3)
+        else:
+            # 多角形は扇形に三角形分割
+            offsets = np.cumsum(f_counts) - f_counts
+            n_tris = np.maximum(f_counts - 2, 0)
+            base = np.repeat(offsets, n_tris)
+            j = np.arange(n_tris.sum()) - np.repeat(np.cumsum(n_tris) - n_tris, n_tris) + 1
+            faces = np.stack([index[base], index[base + j], index[base + j + 1]], axis=1)
+        faces = faces.astype(np.int32)
+
+    return vertices, colors, has_color, faces
+
+def _fromstring(chars, dtype, expected):
+    values = np.fromstring(chars.tobytes(), dtype=dtype, sep=" ")
+    if len(values) != expected:
+        raise ValueError("OBJ の数値を解析できませんでした")
+    return values
+
+# 頂点カラー付きOBJを読み込み、(頂点座標 (n, 3), sRGB頂点カラー (n, 3) float32, 面 (m, 3) int32) を返す。
+# 頂点カラーを持つ v 行が1つも無ければカラーは None。面のインデックスは0始まり。
+def load_vertex_color_obj(path, dtype=np.float32, chunk_size=CHUNK_SIZE, plain_only=False):
+    vertex_parts, color_parts, has_color_parts, face_parts = [], [], [], []
+    vertex_count = 0
+    rest = b""
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                buf, rest = rest, b""
+            else:
+                buf = rest + block
+                cut = buf.rfind(b"\n") + 1
+                if cut == 0:
+                    rest = buf
+                    continue
+                buf, rest = buf[:cut - 1], buf[cut:]
+            if buf:
+                v, c, h, fc = _parse_chunk(buf, vertex_count, dtype, plain_only)
+                vertex_parts.append(v)
+                color_parts.append(c)
+                has_color_parts.append(h)
+                face_parts.append(fc)
+                vertex_count += len(v)
+            if not block:
+                break
+
+    vertices = np.concatenate(vertex_parts) if vertex_parts else np.empty((0, 3), dtype=dtype)
+    faces = np.concatenate(face_parts) if face_parts else np.empty((0, 3), dtype=np.int32)
+    if len(faces) and (faces.min() < 0 or faces.max() >= len(vertices)):
+        raise ValueError(f"OBJ の面が存在しない頂点を参照しています（頂点数 {len(vertices)}）")
+    colors = None
+    if has_color_parts and np.concatenate(has_color_parts).any():
+        colors = np.concatenate(color_parts)
+    return vertices, colors, faces
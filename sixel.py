@@ -0,0 +1,55 @@
+# NumPy だけで書いた Sixel エンコーダ（ezrender.py のプレビュー表示用）。
+#
+# - パレット：RGB 各5bit のヒストグラムから出現頻度の高い色を選ぶ（popularity 法）
+# - 各画素は 32768 通りの 5bit 色 → 最も近いパレット色 の対応表で一括変換
+# - 6行ずつの帯ごとに、色ごとのビット列を行列演算でまとめて作り、ランレングス圧縮して出力
+
+import re
+import numpy as np
+
+MAX_COLORS = 256
+
+_RUN = re.compile(rb"(.)\1{3,}")
+_SIXEL_WEIGHTS = (1 << np.arange(6, dtype=np.uint8))[:, None]
+
+# (h, w, 3) uint8 → (パレット (n, 3) uint8, インデックス画像 (h, w) uint8)
+def quantize(rgb, max_colors=MAX_COLORS):
+    q = (rgb >> 3).astype(np.int32)
+    bins = (q[..., 0] << 10) | (q[..., 1] << 5) | q[..., 2]
+    counts = np.bincount(bins.ravel(), minlength=1 << 15)
+    used = np.flatnonzero(counts)
+    chosen = used[np.argsort(counts[used])[::-1][:max_colors]]
+    palette = np.stack([(chosen >> 10) & 31, (chosen >> 5) & 31, chosen & 31], axis=1) * 8 + 4
+
+    # 画像に現れる 5bit 色だけを、最も近いパレット色へ対応付ける
+    centers = np.stack([(used >> 10) & 31, (used >> 5) & 31, used & 31], axis=1) * 8 + 4
+    lut = np.zeros(1 << 15, dtype=np.uint8)
+    for start in range(0, len(used), 4096):
+        block = centers[start:start + 4096, None, :] - palette[None, :, :]
+        lut[used[start:start + 4096]] = np.argmin((block * block).sum(axis=2), axis=1)
+    return palette.astype(np.uint8), lut[bins]
+
+def _compress(line):
+    return _RUN.sub(lambda m: b"!%d%s" % (len(m.group(0)), m.group(1)), line)
+
+def encode(rgb, max_colors=MAX_COLORS):
+    height, width = rgb.shape[:2]
+    palette, index = quantize(rgb, max_colors)
+
+    out = [b'\x1bPq"1;1;%d;%d' % (width, height)]
+    for i, (r, g, b) in enumerate(palette.astype(np.int32) * 100 // 255):
+        out.append(b"#%d;2;%d;%d;%d" % (i, r, g, b))
+
+    # 高さを6の倍数にそろえる（はみ出した行は描かれない色 -1 で埋める）
+    pad = (-height) % 6
+    bands = np.pad(index.astype(np.int16), ((0, pad), (0, 0)), constant_values=-1).reshape(-1, 6, width)
+    for band in bands:
+        colors = np.unique(band)
+        colors = colors[colors >= 0]
+        # (色, 6行, 幅) の一致マスク → 各列の6bitパターン
+        bits = ((band[None, :, :] == colors[:, None, None]) * _SIXEL_WEIGHTS).sum(axis=1)
+        chars = (bits + 63).astype(np.uint8)
+        lines = [b"#%d%s" % (c, _compress(row.tobytes())) for c, row in zip(colors, chars)]
+        out.append(b"$".join(lines) + b"-")
+    out.append(b"\x1b\\")
+    return b"".join(out)
@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "utils"))
+
+import batchconv
+
+
+def fail_halfway(src, dst, args):
+    with open(dst, "w") as f:
+        f.write("partial")
+    raise RuntimeError("boom")
+
+
+def copy_input(src, dst, args):
+    with batchconv.atomic_output(dst) as temp, open(temp, "w") as f:
+        f.write(open(src).read())
+
+
+def test_failed_conversion_is_retried_on_next_run(tmp_path):
+    src = tmp_path / "a.obj"
+    src.write_text("v 0 0 0\n")
+    pairs = batchconv.plan_outputs([str(src)], str(tmp_path / "out"), ".glb")
+    dst = pairs[0][1]
+
+    assert batchconv.run_batch(pairs, fail_halfway, None) == 1
+    assert not os.path.exists(dst)
+
+    assert batchconv.run_batch(pairs, copy_input, None) == 0
+    assert open(dst).read() == "v 0 0 0\n"
+
+
+def test_atomic_output_keeps_previous_file_on_error(tmp_path):
+    dst = tmp_path / "out.zip"
+    dst.write_text("old")
+    with pytest.raises(RuntimeError):
+        with batchconv.atomic_output(str(dst)) as temp:
+            with open(temp, "w") as f:
+                f.write("new but incomplete")
+            raise RuntimeError("boom")
+    assert dst.read_text() == "old"
+    assert os.listdir(tmp_path) == ["out.zip"]
@@ -0,0 +1,106 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(__file__), "..", "utils", "tkg_era3d_fullauto.py")
+STAGES = ["segment", "mvdiffusion", "nsr", "objfix"]
+RESOURCE = {"segment": "cpu", "mvdiffusion": "gpu", "nsr": "gpu", "objfix": "cpu"}
+
+
+def stub(log, stage, body):
+    # 開始・終了時刻をログに残し、少し待ってから本来の出力だけを作るスタブ
+    return (f"echo start {stage} {{name}} $(date +%s.%N) >> {log} && sleep 0.3 && {body}"
+            f" && echo end {stage} {{name}} $(date +%s.%N) >> {log}")
+
+
+@pytest.fixture
+def era3d(tmp_path):
+    root = tmp_path / "Era3D"
+    (root / "instant-nsr-pl").mkdir(parents=True)
+    log = tmp_path / "stages.log"
+    commands = {
+        "segment_rembg": stub(log, "segment", "cp {input} {foreground}"),
+        "mvdiffusion": stub(log, "mvdiffusion", "mkdir -p {mv_dir} && cp {foreground} {mv_dir}/color_0.png"),
+        "nsr": stub(log, "nsr", "mkdir -p {recon_base}/@20260101/save"
+                                " && cat {mv_dir}/color_0.png > {recon_base}/@20260101/save/refine_{name}.obj"),
+        "objfix": stub(log, "objfix", "cp {recon_obj} {fixed_obj}"),
+    }
+    commands_path = tmp_path / "commands.json"
+    commands_path.write_text(json.dumps(commands))
+    images = []
+    for name in ("a", "b", "c"):
+        image = tmp_path / f"{name}.png"
+        image.write_text(f"image {name}\n")
+        images.append(str(image))
+
+    def run(*extra):
+        if log.exists():
+            log.unlink()
+        result = subprocess.run(
+            [sys.executable, SCRIPT, "-i", *images, "--no-preview", "--era3d-dir", str(root),
+             "--commands", str(commands_path), "--cpu-jobs", "2", "--gpu-jobs", "1", *extra],
+            capture_output=True, text=True)
+        assert result.returncode == 0, result.stdout + result.stderr
+        events = []
+        if log.exists():
+            for line in log.read_text().splitlines():
+                kind, stage, name, t = line.split()
+                events.append((kind, stage, name, float(t)))
+        return events
+
+    run.root = root
+    run.images = images
+    return run
+
+
+def intervals(events):
+    spans = {}
+    for kind, stage, name, t in events:
+        spans.setdefault((stage, name), {})[kind] = t
+    return {key: (span["start"], span["end"]) for key, span in spans.items()}
+
+
+def max_overlap(spans):
+    points = sorted([(s, 1) for s, _ in spans] + [(e, -1) for _, e in spans])
+    running = peak = 0
+    for _, delta in points:
+        running += delta
+        peak = max(peak, running)
+    return peak
+
+
+def test_stages_respect_resource_limits_and_order(era3d):
+    spans = intervals(era3d())
+    assert set(spans) == {(stage, name) for stage in STAGES for name in "abc"}
+
+    gpu = [span for (stage, _), span in spans.items() if RESOURCE[stage] == "gpu"]
+    cpu = [span for (stage, _), span in spans.items() if RESOURCE[stage] == "cpu"]
+    assert max_overlap(gpu) == 1
+    assert max_overlap(cpu) == 2
+
+    for name in "abc":
+        for before, after in zip(STAGES, STAGES[1:]):
+            assert spans[(before, name)][1] <= spans[(after, name)][0], (name, before, after)
+    assert os.path.isfile(era3d.root / "instant-nsr-pl" / "recon" / "a" / "@20260101" / "save" / "refine_a_fixed.obj")
+
+
+def test_manifest_resume_and_force_stage(era3d):
+    era3d()
+    manifest = json.loads((era3d.root / "stage_cache" / "a.json").read_text())
+    assert set(manifest["stages"]) == set(STAGES)
+
+    # 入力が変わっていなければ全段階を再利用する
+    assert era3d() == []
+
+    # --force-stage nsr は NSR だけをやり直す（出力が同じなので修復処理は再利用される）
+    events = era3d("--force-stage", "nsr")
+    assert sorted(intervals(events)) == [("nsr", name) for name in "abc"]
+
+    # 入力画像が変わった画像だけ、全段階をやり直す
+    with open(era3d.images[0], "a") as f:
+        f.write("changed\n")
+    events = era3d()
+    assert sorted(intervals(events)) == sorted((stage, "a") for stage in STAGES)
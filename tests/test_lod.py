@@ -0,0 +1,29 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+trimesh = pytest.importorskip("trimesh")
+pytest.importorskip("pymeshlab")
+
+import ezrender
+
+
+def test_lod_scene_shares_untouched_geometry():
+    scene = trimesh.Scene()
+    scene.add_geometry(trimesh.creation.icosphere(4), geom_name="sphere")
+    box = trimesh.creation.box()
+    box.visual.face_colors = [255, 0, 0, 255]
+    scene.add_geometry(box, geom_name="box", transform=trimesh.transformations.translation_matrix([3, 0, 0]))
+
+    lod = ezrender.make_lod_scene(scene, 1000)
+
+    assert len(lod.geometry["sphere"].faces) <= 1000
+    assert len(scene.geometry["sphere"].faces) == 5120
+    # 面カラーのメッシュは間引かず、元のオブジェクトをそのまま使う（複製しない）
+    assert lod.geometry["box"] is scene.geometry["box"]
+    assert lod.graph is not scene.graph
+    np.testing.assert_allclose(lod.graph["box"][0], scene.graph["box"][0])
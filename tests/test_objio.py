@@ -0,0 +1,97 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import objio
+
+
+def load(tmp_path, text, **kwargs):
+    path = tmp_path / "model.obj"
+    path.write_bytes(text.encode() if isinstance(text, str) else text)
+    return objio.load_vertex_color_obj(str(path), dtype=np.float64, **kwargs)
+
+
+SQUARE = "v 0 0 0 1 0 0\nv 1 0 0 0 1 0\nv 1 1 0 0 0 1\nv 0 1 0 1 1 1\n"
+
+
+def test_vertices_and_colors(tmp_path):
+    vertices, colors, faces = load(tmp_path, SQUARE + "f 1 2 3\n")
+    np.testing.assert_array_equal(vertices, [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]])
+    np.testing.assert_array_equal(colors, [[1, 0, 0], [0, 1, 0], [0, 0, 1], [1, 1, 1]])
+    np.testing.assert_array_equal(faces, [[0, 1, 2]])
+
+
+def test_vertices_without_color_are_white_or_none(tmp_path):
+    _, colors, _ = load(tmp_path, "v 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 3\n")
+    assert colors is None
+    _, colors, _ = load(tmp_path, "v 0 0 0 0.5 0.5 0.5\nv 1 0 0\nv 0 1 0\nf 1 2 3\n")
+    np.testing.assert_array_equal(colors, [[0.5, 0.5, 0.5], [1, 1, 1], [1, 1, 1]])
+
+
+@pytest.mark.parametrize("face", ["f 1 2 3", "f 1/1 2/2 3/3", "f 1//1 2//2 3//3", "f 1/1/1 2/2/2 3/3/3"])
+def test_slash_forms(tmp_path, face):
+    _, _, faces = load(tmp_path, SQUARE + face + "\n")
+    np.testing.assert_array_equal(faces, [[0, 1, 2]])
+
+
+def test_negative_indices_are_relative_to_vertices_defined_so_far(tmp_path):
+    text = "v 0 0 0\nv 1 0 0\nv 0 1 0\nf -3 -2 -1\nv 1 1 0\nf -3/1 -2/2 -1/3\n"
+    _, _, faces = load(tmp_path, text)
+    np.testing.assert_array_equal(faces, [[0, 1, 2], [1, 2, 3]])
+
+
+def test_comments(tmp_path):
+    text = "# header\nv 0 0 0 # trailing\nv 1 0 0\n#v 9 9 9\nv 0 1 0\nf 1 2 3 # face\n"
+    vertices, _, faces = load(tmp_path, text)
+    assert len(vertices) == 3
+    np.testing.assert_array_equal(faces, [[0, 1, 2]])
+
+
+def test_cr_tab_and_indentation(tmp_path):
+    text = "v\t0 0 0\r\n  v 1\t0 0\r\n\tv 0 1 0\r\nf 1\t2 3\r\n"
+    vertices, _, faces = load(tmp_path, text)
+    np.testing.assert_array_equal(vertices, [[0, 0, 0], [1, 0, 0], [0, 1, 0]])
+    np.testing.assert_array_equal(faces, [[0, 1, 2]])
+
+
+def test_polygons_are_fan_triangulated(tmp_path):
+    text = SQUARE + "v 0.5 2 0\nf 1 2 3 4 5\nf 1 2 3\n"
+    _, _, faces = load(tmp_path, text)
+    np.testing.assert_array_equal(faces, [[0, 1, 2], [0, 2, 3], [0, 3, 4], [0, 1, 2]])
+
+
+def test_chunk_boundary_inside_a_line(tmp_path):
+    text = "".join(f"v {i} {i + 0.25} {-i} 0.5 0.25 1\n" for i in range(50))
+    text += "".join(f"f {i + 1}/{i + 1} {i + 2} {i + 3}\n" for i in range(48))
+    expected = load(tmp_path, text)
+    # どの位置でチャンクが切れても（行の途中・改行の直前直後）同じ結果になる
+    for chunk_size in (7, 13, 64, 101):
+        result = load(tmp_path, text, chunk_size=chunk_size)
+        for a, b in zip(result, expected):
+            np.testing.assert_array_equal(a, b)
+    assert len(expected[0]) == 50 and len(expected[2]) == 48
+
+
+def test_missing_final_newline(tmp_path):
+    vertices, _, faces = load(tmp_path, "v 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 3")
+    assert len(vertices) == 3
+    np.testing.assert_array_equal(faces, [[0, 1, 2]])
+
+
+@pytest.mark.parametrize("face", ["f 1 2 4", "f 0 1 2", "f -4 1 2"])
+def test_out_of_range_faces_are_rejected(tmp_path, face):
+    with pytest.raises(ValueError):
+        load(tmp_path, "v 0 0 0\nv 1 0 0\nv 0 1 0\n" + face + "\n")
+
+
+@pytest.mark.parametrize("line", ["vt 0 0", "vn 0 0 1", "usemtl material_0", "  mtllib a.mtl"])
+def test_plain_only_rejects_other_attributes(tmp_path, line):
+    text = "v 0 0 0\nv 1 0 0\nv 0 1 0\n" + line + "\nf 1 2 3\n"
+    with pytest.raises(objio.OBJFeatureError):
+        load(tmp_path, text, plain_only=True)
+    _, _, faces = load(tmp_path, text)
+    np.testing.assert_array_equal(faces, [[0, 1, 2]])
@@ -0,0 +1,66 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import ezrender
+
+
+@pytest.fixture
+def model(tmp_path):
+    path = tmp_path / "model.obj"
+    path.write_text("v 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 3\n")
+    return str(path)
+
+
+def test_accepts_request_within_limits(model):
+    model_file, overrides = ezrender.parse_render_request(
+        {"model": [model], "views": ["8"], "size": ["512x512"], "grid": ["4x2"]})
+    assert model_file == model
+    assert overrides["views"] == 8
+    assert overrides["size"] == (512, 512)
+    assert overrides["grid"] == (4, 2)
+
+
+@pytest.mark.parametrize("params, message", [
+    ({"views": str(ezrender.SERVE_MAX_VIEWS + 1)}, "'views' must be <="),
+    ({"size": "16384x16384", "angle": "0"}, "pixels in total"),
+    ({"size": "0x512"}, "'size' must be at least"),
+    ({"grid": "100x100", "views": "4"}, "pixels in total"),
+    # どれも単独では小さいが、掛け合わせるとキャンバスが大きすぎる
+    ({"views": "64", "size": "2048x2048", "format": "png"}, "pixels in total"),
+    ({"views": "2", "size": "9000x10", "format": "webp"}, "px per side"),
+])
+def test_rejects_request_over_limits(model, params, message):
+    with pytest.raises(ValueError, match=message):
+        ezrender.parse_render_request({"model": model, **params})
+
+
+def test_default_size_counts_towards_canvas_limit(model):
+    with pytest.raises(ValueError, match="pixels in total"):
+        ezrender.parse_render_request({"model": model, "views": "64"}, default_size=(4096, 4096))
+
+
+@pytest.mark.parametrize("value", [5, 1.0, [5], {"a": 1}, True])
+def test_rejects_non_string_model(value):
+    with pytest.raises(ValueError, match="'model' must be a path string"):
+        ezrender.parse_render_request({"model": value})
+
+
+def test_unix_server_refuses_to_replace_regular_file(tmp_path):
+    path = tmp_path / "not-a-socket"
+    path.write_text("keep me")
+    with pytest.raises(SystemExit):
+        ezrender.make_server(f"unix:{path}")
+    assert path.read_text() == "keep me"
+
+
+def test_unix_server_replaces_stale_socket(tmp_path):
+    path = str(tmp_path / "render.sock")
+    server, location = ezrender.make_server(f"unix:{path}")
+    server.server_close()
+    server, location = ezrender.make_server(f"unix:{path}")
+    server.server_close()
+    assert location == f"unix:{path}"
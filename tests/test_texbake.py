@@ -0,0 +1,60 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "utils"))
+
+import texbake
+
+RED, GREEN, BLUE = (1, 0, 0), (0, 1, 0), (0, 0, 1)
+
+
+def test_uv_orientation_and_texel_centres():
+    # UV (0,0) 赤・(1,0) 緑・(0,1) 青の直角三角形を 4x4 に焼く。
+    # テクセル (列 i, 行 j) の中心は u = (i + 0.5) / 4, v = 1 - (j + 0.5) / 4（1行目が v=1 側）で、
+    # u + v <= 1、つまり i <= j のテクセルが塗られる
+    uv = np.array([[[0, 0], [1, 0], [0, 1]]], dtype=np.float64)
+    colors = np.array([[RED, GREEN, BLUE]], dtype=np.float32)
+    image = texbake.bake_vertex_colors(uv, colors, 4, jobs=1, dilate_passes=0)
+
+    assert image.shape == (4, 4, 3)
+    painted = image.any(axis=2)
+    np.testing.assert_array_equal(painted, np.tri(4, dtype=bool))
+    # 左下 (u, v) = (0.125, 0.125): 赤 0.75、緑 0.125、青 0.125
+    np.testing.assert_array_equal(image[3, 0], [191, 32, 32])
+    # 左上 (u, v) = (0.125, 0.875): 緑 0.125、青 0.875
+    np.testing.assert_array_equal(image[0, 0], [0, 32, 223])
+    # 右下 (u, v) = (0.875, 0.125): 緑 0.875、青 0.125
+    np.testing.assert_array_equal(image[3, 3], [0, 223, 32])
+
+
+def test_dilation_fills_neighbours():
+    uv = np.array([[[0, 0], [1, 0], [0, 1]]], dtype=np.float64)
+    colors = np.array([[RED, RED, RED]], dtype=np.float32)
+    # 1回の膨張で塗られたテクセルの8近傍まで広がり、右上の角だけが残る
+    image = texbake.bake_vertex_colors(uv, colors, 4, jobs=1, dilate_passes=1)
+    np.testing.assert_array_equal(image[..., 0] == 255, np.tri(4, k=2, dtype=bool))
+    assert (image[..., 1:] == 0).all()
+
+
+def test_tiled_multiprocess_matches_single_process():
+    rng = np.random.default_rng(0)
+    n = 400
+    centres = rng.random((n, 1, 2))
+    uv = np.clip(centres + rng.normal(scale=0.05, size=(n, 3, 2)), 0, 1)
+    colors = rng.random((n, 3, 3)).astype(np.float32)
+
+    single = texbake.bake_vertex_colors(uv, colors, 96, jobs=1, tile_size=96)
+    tiled = texbake.bake_vertex_colors(uv, colors, 96, jobs=4, tile_size=20)
+    np.testing.assert_array_equal(tiled, single)
+    assert single.any()
+
+
+def test_small_chunks_match(monkeypatch):
+    rng = np.random.default_rng(1)
+    uv = rng.random((50, 3, 2))
+    colors = rng.random((50, 3, 3)).astype(np.float32)
+    expected = texbake.bake_vertex_colors(uv, colors, 32, jobs=1)
+    monkeypatch.setattr(texbake, "CHUNK_TEXELS", 7)
+    np.testing.assert_array_equal(texbake.bake_vertex_colors(uv, colors, 32, jobs=1), expected)
@@ -0,0 +1,38 @@
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "utils"))
+
+pytest.importorskip("trimesh")
+from PIL import Image
+
+import vc2glb
+
+
+def read_glb_json(path):
+    with open(path, "rb") as f:
+        magic, _, _ = struct.unpack("<4sII", f.read(12))
+        assert magic == b"glTF"
+        length, kind = struct.unpack("<I4s", f.read(8))
+        assert kind == b"JSON"
+        return json.loads(f.read(length))
+
+
+def test_convert_to_glb_writes_normals(tmp_path):
+    vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1]], dtype=np.float64)
+    faces = np.array([[0, 2, 1], [0, 1, 3], [0, 3, 2], [1, 2, 3]], dtype=np.int32)
+    normals = vertices - vertices.mean(axis=0)
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    uvs = vertices[:, :2].copy()
+    texture = Image.new("RGB", (4, 4), (255, 0, 0))
+
+    output = tmp_path / "out.glb"
+    vc2glb.convert_to_glb(vertices, faces, normals, uvs, texture, str(output))
+
+    attributes = read_glb_json(output)["meshes"][0]["primitives"][0]["attributes"]
+    assert {"POSITION", "NORMAL", "TEXCOORD_0"} <= set(attributes)
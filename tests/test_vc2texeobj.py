@@ -0,0 +1,52 @@
+import datetime
+import os
+import shutil
+import subprocess
+import sys
+import zipfile
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "utils"))
+
+import vc2texeobj
+
+
+class StubMesh:
+    # write_obj が使う pymeshlab.Mesh のメソッドだけを持つ
+    def vertex_matrix(self):
+        return np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0]], dtype=np.float64)
+
+    def vertex_color_matrix(self):
+        return np.array([[1, 0, 0, 1], [0, 1, 0, 1], [0, 0, 1, 1]], dtype=np.float64)
+
+    def vertex_normal_matrix(self):
+        return np.array([[0, 0, 1]] * 3, dtype=np.float64)
+
+    def wedge_tex_coord_matrix(self):
+        return np.array([[0, 0], [1, 0], [0, 1]], dtype=np.float64)
+
+    def face_matrix(self):
+        return np.array([[0, 1, 2]], dtype=np.int32)
+
+
+@pytest.mark.parametrize("level", [None, 6, 9])
+def test_streamed_zip_entries_have_real_dates(tmp_path, level):
+    zip_path = tmp_path / "model.zip"
+    before = datetime.datetime.now().replace(microsecond=0) - datetime.timedelta(seconds=2)
+    sizes = vc2texeobj.write_zip(str(zip_path), StubMesh(), "model", lambda f: f.write(b"png"), level)
+    after = datetime.datetime.now() + datetime.timedelta(seconds=2)
+
+    assert set(sizes) == {"OBJ", "MTL", "PNG"}
+    with zipfile.ZipFile(zip_path) as zipf:
+        assert zipf.testzip() is None
+        for info in zipf.infolist():
+            assert before <= datetime.datetime(*info.date_time) <= after, info.filename
+        assert "mtllib ./model.mtl" in zipf.read("model.obj").decode()
+        expected = zipfile.ZIP_STORED if level is None else zipfile.ZIP_DEFLATED
+        assert zipf.getinfo("model.obj").compress_type == expected
+        assert zipf.getinfo("model.png").compress_type == zipfile.ZIP_STORED
+
+    if shutil.which("unzip"):
+        subprocess.run(["unzip", "-t", str(zip_path)], check=True, capture_output=True)
@@ -0,0 +1,141 @@
+# vc2glb.py / vc2texeobj.py のバッチ変換。vc2glb.py と vc2texeobj.py で共有しています。
+#
+# - 入力はファイル・ディレクトリ（中の .obj）・グロブパターンで指定し、出力は --out-dir に「入力名＋拡張子」で作ります
+# - 出力が入力より新しいものはスキップします（--force で全部やり直し）
+# - ワーカープロセスは使い回すので、pymeshlab / xatlas の import はワーカーごとに1回で済みます
+# - 1件の失敗でバッチ全体は止めず、最後にまとめて報告します（失敗した件の出力は消し、次回また変換します）
+
+import contextlib
+import glob
+import io
+import multiprocessing
+import os
+import time
+
+def expand_inputs(patterns, extensions=(".obj",)):
+    paths = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            paths.extend(sorted(glob.glob(pattern, recursive=True)))
+        elif os.path.isdir(pattern):
+            paths.extend(sorted(
+                os.path.join(pattern, name) for name in os.listdir(pattern)
+                if name.lower().endswith(extensions)
+            ))
+        else:
+            paths.append(pattern)
+    return paths
+
+def plan_outputs(inputs, out_dir, ext):
+    # 入力ごとの出力パス。名前が重なると別の入力の出力を上書きしてしまうので、始める前に止める
+    pairs, owners = [], {}
+    for src in inputs:
+        dst = os.path.join(out_dir, os.path.splitext(os.path.basename(src))[0] + ext)
+        if dst in owners:
+            raise ValueError(f"出力名が重複します: {owners[dst]} と {src} → {dst}")
+        owners[dst] = src
+        pairs.append((src, dst))
+    return pairs
+
+@contextlib.contextmanager
+def atomic_output(path):
+    # 出力先と同じディレクトリの一時ファイルに書かせ、成功したときだけ本来の名前に置き換える
+    # （途中で失敗しても不完全なファイルが出力名で残らず、次のバッチで「変換済み」と誤判定されない）
+    directory, name = os.path.split(os.path.abspath(path))
+    temp = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+    try:
+        yield temp
+        os.replace(temp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temp)
+        raise
+
+def is_up_to_date(src, dst):
+    return os.path.exists(dst) and os.path.getmtime(dst) >= os.path.getmtime(src)
+
+# ワーカー：変換関数と引数はプロセスごとに1回だけ受け取る
+_convert = None
+_args = None
+
+def _init_worker(convert, args):
+    global _convert, _args
+    _convert, _args = convert, args
+
+def _convert_worker(pair):
+    src, dst = pair
+    log = io.StringIO()
+    start = time.perf_counter()
+    error = None
+    cwd = os.getcwd()
+    with contextlib.redirect_stdout(log):
+        try:
+            _convert(src, dst, _args)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            # 書きかけの出力が残ると、出力の方が新しいので次のバッチでスキップされてしまう
+            with contextlib.suppress(OSError):
+                os.remove(dst)
+        finally:
+            # pymeshlab は読み込みに失敗するとカレントディレクトリを入力の場所に変えたままにするので、次の入力のために戻す
+            os.chdir(cwd)
+    return src, dst, time.perf_counter() - start, error, log.getvalue()
+
+def format_rate(count, seconds):
+    return f"{count / seconds * 60:.1f} 件/分" if seconds > 0 else "-"
+
+def run_batch(pairs, convert, args, jobs=1, force=False):
+    """
+    pairs: (入力, 出力) のリスト、convert(入力, 出力, args): 1件分の変換
+    失敗した件数を返す
+    """
+    todo = []
+    for src, dst in pairs:
+        if not force and is_up_to_date(src, dst):
+            print(f"⏭️ スキップ（出力が新しい）: {dst}")
+        else:
+            todo.append((src, dst))
+    skipped = len(pairs) - len(todo)
+    jobs = max(1, min(jobs, len(todo)))
+    for dst in {os.path.dirname(dst) for _, dst in todo}:
+        os.makedirs(dst or ".", exist_ok=True)
+
+    print(f"🚚 {len(todo)} 件を変換します（ワーカー {jobs}、スキップ {skipped}）")
+    start = time.perf_counter()
+    busy = 0.0
+    input_bytes = 0
+    failures = []
+    if jobs > 1:
+        ctx = multiprocessing.get_context("spawn")
+        pool = ctx.Pool(jobs, initializer=_init_worker, initargs=(convert, args))
+        results = pool.imap_unordered(_convert_worker, todo)
+    else:
+        pool = None
+        _init_worker(convert, args)
+        results = map(_convert_worker, todo)
+    try:
+        for done, (src, dst, seconds, error, log) in enumerate(results, 1):
+            busy += seconds
+            print(f"\n📦 [{done}/{len(todo)}] {src}")
+            print(log, end="")
+            if error:
+                failures.append((src, error))
+                print(f"❌ 失敗: {src}: {error}")
+            else:
+                input_bytes += os.path.getsize(src)
+                print(f"✅ {dst}（{seconds:.1f} 秒）")
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    elapsed = time.perf_counter() - start
+
+    converted = len(todo) - len(failures)
+    print(f"\n📊 バッチ結果: 変換 {converted} / 失敗 {len(failures)} / スキップ {skipped}（ワーカー {jobs}）")
+    if todo:
+        print(f"⏱️ 経過 {elapsed:.1f} 秒、{format_rate(converted, elapsed)}、"
+              f"入力 {input_bytes / max(elapsed, 1e-9) / 1e6:.1f} MB/秒、"
+              f"1件あたり平均 {busy / len(todo):.1f} 秒（並列度 {busy / max(elapsed, 1e-9):.1f}）")
+    for src, error in failures:
+        print(f"  ❌ {src}: {error}")
+    return len(failures)
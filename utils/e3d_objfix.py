@@ -13,9 +13,23 @@
 
 import argparse
 import numpy as np
-import trimesh
 import os
 
+# 高速OBJローダ（EzRender直下の objio.py）を使う。単体で配布された場合は従来の行ごとの読み込みに戻る
+# （sys.path は変えずにファイルの場所を直接指定して読み込む。別の場所にコピーされて実行されても、
+#   親ディレクトリにあるモジュールが標準のモジュールを隠してしまわないように）
+def _load_objio():
+    import importlib.util
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "objio.py")
+    if not os.path.isfile(path):
+        return None
+    spec = importlib.util.spec_from_file_location("objio", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.load_vertex_color_obj
+
+load_vertex_color_obj = _load_objio()
+
 # sRGBからリニア色空間への変換（γ補正を外す）
 def srgb_to_linear(c):
     return np.where(c <= 0.04045,
@@ -30,6 +44,15 @@ def linear_to_srgb(c):
 
 # OBJファイルを読み込み、頂点位置・頂点カラー（sRGB）・面情報を抽出
 def load_obj_with_vertex_colors(obj_path):
+    import trimesh  # import が重いので --help やエラー時には読み込まない
+    if load_vertex_color_obj is not None:
+        vertices, vertex_colors, faces = load_vertex_color_obj(obj_path, dtype=np.float64)
+        if vertex_colors is None:
+            vertex_colors = np.ones((len(vertices), 3), dtype=np.float32)  # デフォルトは白
+        vertex_colors_linear = srgb_to_linear(np.clip(vertex_colors, 0.0, 1.0))
+        mesh = trimesh.Trimesh(vertices=vertices, faces=faces, process=False)
+        return mesh, vertex_colors_linear
+
     vertices = []
     vertex_colors = []
     faces = []
@@ -69,14 +92,21 @@ def flip_mesh(mesh):
     mesh.faces = mesh.faces[:, ::-1]
 
 # OBJ形式でメッシュとsRGB頂点カラーを書き出す
-def save_obj_with_vertex_colors(mesh, rgb_linear, output_path):
-    rgb_srgb = linear_to_srgb(np.clip(rgb_linear, 0.0, 1.0))  # sRGBに戻す
-    with open(output_path, 'w') as f:
-        for v, c in zip(mesh.vertices, rgb_srgb):
-            f.write(f"v {v[0]:.6f} {v[1]:.6f} {v[2]:.6f} {c[0]:.6f} {c[1]:.6f} {c[2]:.6f}\n")
-        for face in mesh.faces:
-            idxs = face + 1  # OBJは1始まり
-            f.write(f"f {idxs[0]} {idxs[1]} {idxs[2]}\n")
+# （WRITE_CHUNK 行ずつまとめて "%.6f" で整形し、バッファ付きで書き込む）
+WRITE_CHUNK = 100000
+
+def save_obj_with_vertex_colors(mesh, rgb_linear, output_path, chunk_size=WRITE_CHUNK):
+    vertices = mesh.vertices
+    faces = mesh.faces
+    with open(output_path, 'w', buffering=1 << 20) as f:
+        for start in range(0, len(vertices), chunk_size):
+            end = start + chunk_size
+            rgb_srgb = linear_to_srgb(np.clip(rgb_linear[start:end], 0.0, 1.0))  # sRGBに戻す
+            block = np.hstack((vertices[start:end], rgb_srgb))
+            f.write(("v %.6f %.6f %.6f %.6f %.6f %.6f\n" * len(block)) % tuple(block.ravel().tolist()))
+        for start in range(0, len(faces), chunk_size):
+            block = faces[start:start + chunk_size] + 1  # OBJは1始まり
+            f.write(("f %d %d %d\n" * len(block)) % tuple(block.ravel().tolist()))
 
 # メイン処理：引数解析 → 読み込み → 反転（必要に応じて） → OBJ出力
 def main():
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+ezbench.py - EzRender パイプラインのベンチマーク
+
+合成メッシュ（頂点カラーOBJ / テクスチャ付きGLB）をいくつかの面数で生成し、
+  load（OBJ パース＋sRGB→Linear 変換 / GLB 読み込み）→ pyrender シーン化 → レンダリング → 画像保存
+の各段階と、e3d_objfix.py / srgb2linobj.py の一連の処理を個別に計測して JSON に書き出します。
+保存しておいた JSON を --baseline に渡すと、段階ごとの比較表を表示します。
+
+CPU のみのヘッドレス環境でも動くよう、OpenGL は既定で OSMesa を使います。
+
+使い方:
+  python utils/ezbench.py --sizes 10k,100k,1m -o bench.json
+  python utils/ezbench.py --sizes 10k,100k,1m --baseline bench.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("PYOPENGL_PLATFORM", "osmesa")
+
+UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(UTILS_DIR, ".."))
+sys.path.insert(0, UTILS_DIR)
+
+import numpy as np
+import ezrender
+import e3d_objfix
+import srgb2linobj
+
+def parse_count(text):
+    text = text.strip().lower()
+    scale = {"k": 1000, "m": 1000000}.get(text[-1:], 1)
+    return int(float(text[:-1] if scale > 1 else text) * scale)
+
+def format_count(n):
+    if n >= 1000000 and n % 1000000 == 0:
+        return f"{n // 1000000}m"
+    if n >= 1000 and n % 1000 == 0:
+        return f"{n // 1000}k"
+    return str(n)
+
+# 面数 faces 前後の波打つグリッドメッシュ（座標・頂点カラー・UV・面）を作る
+def make_grid_mesh(faces, seed=0):
+    n = int(np.ceil(np.sqrt(faces / 2.0))) + 1
+    u, v = np.meshgrid(np.linspace(0.0, 1.0, n), np.linspace(0.0, 1.0, n))
+    z = 0.1 * np.sin(6 * np.pi * u) * np.cos(4 * np.pi * v)
+    vertices = np.stack([u - 0.5, v - 0.5, z], axis=-1).reshape(-1, 3)
+    rng = np.random.default_rng(seed)
+    colors = np.clip(np.stack([u, v, 0.5 + z * 4], axis=-1).reshape(-1, 3) + rng.normal(0, 0.02, (n * n, 3)), 0.0, 1.0)
+    uv = np.stack([u, v], axis=-1).reshape(-1, 2)
+    idx = np.arange(n * n).reshape(n, n)
+    a, b, c, d = idx[:-1, :-1].ravel(), idx[:-1, 1:].ravel(), idx[1:, 1:].ravel(), idx[1:, :-1].ravel()
+    tris = np.concatenate([np.stack([a, b, c], axis=1), np.stack([a, c, d], axis=1)])
+    return vertices, colors, uv, tris
+
+def write_vertex_color_obj(path, vertices, colors, tris):
+    with open(path, "w", buffering=1 << 20) as f:
+        for start in range(0, len(vertices), 100000):
+            block = np.hstack((vertices[start:start + 100000], colors[start:start + 100000]))
+            f.write(("v %.6f %.6f %.6f %.6f %.6f %.6f\n" * len(block)) % tuple(block.ravel().tolist()))
+        for start in range(0, len(tris), 100000):
+            block = tris[start:start + 100000] + 1
+            f.write(("f %d %d %d\n" * len(block)) % tuple(block.ravel().tolist()))
+
+def write_textured_glb(path, vertices, uv, tris, tex_size=1024):
+    import trimesh
+    from PIL import Image
+    gx, gy = np.meshgrid(np.arange(tex_size), np.arange(tex_size))
+    texture = np.stack([gx * 255 // tex_size, gy * 255 // tex_size, ((gx ^ gy) & 255)], axis=-1).astype(np.uint8)
+    material = trimesh.visual.material.PBRMaterial(baseColorTexture=Image.fromarray(texture))
+    mesh = trimesh.Trimesh(vertices=vertices, faces=tris,
+                           visual=trimesh.visual.TextureVisuals(uv=uv, material=material), process=False)
+    mesh.export(path)
+
+# fn を repeat 回実行し、最小・中央値（秒）を返す。失敗したらエラー内容を記録する
+def measure(fn, repeat):
+    samples = []
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    return {"min": min(samples), "median": float(np.median(samples)), "repeat": repeat}
+
+def bench_render_stages(tri_scene, workdir, size, repeat, result):
+    try:
+        import pyrender
+    except ImportError as e:
+        result["from_trimesh_scene"] = {"error": f"{type(e).__name__}: {e}"}
+        return
+    width, height = size
+    center = tri_scene.centroid
+    scale = np.linalg.norm(tri_scene.extents)
+    eye = ezrender.spherical_camera_position(center, scale * 2.0, 45.0)
+    pose = np.linalg.inv(ezrender.look_at_view_matrix(eye, center))
+
+    scenes = []
+    result["from_trimesh_scene"] = measure(
+        lambda: scenes.append(pyrender.Scene.from_trimesh_scene(tri_scene, bg_color=[0.5, 0.5, 0.5, 1.0])), repeat)
+    if not scenes:
+        return
+    scene = scenes[-1]
+    images = []
+    # 1枚ごとにレンダラを作り直す場合（コンテキスト生成＋アップロード込み）
+    result["render_image"] = measure(lambda: images.append(ezrender.render_image(scene, pose, width, height, scale * 10.0)), repeat)
+    # 常駐セッションでの2枚目以降（視点変更のみ）
+    try:
+        session = ezrender.RenderSession(width, height)
+        session.set_scene(scene, scale * 10.0)
+        session.render_array(pose)
+        result["render_warm"] = measure(lambda: session.render_array(pose), repeat)
+        session.close()
+    except Exception as e:
+        result["render_warm"] = {"error": f"{type(e).__name__}: {e}"}
+    if images:
+        out = os.path.join(workdir, "render.webp")
+        result["save_webp"] = measure(lambda: images[-1].save(out), repeat)
+
+def run(args):
+    workdir = args.workdir or tempfile.mkdtemp(prefix="ezbench-")
+    os.makedirs(workdir, exist_ok=True)
+    results = {}
+    try:
+        for faces in args.sizes:
+            label = format_count(faces)
+            vertices, colors, uv, tris = make_grid_mesh(faces)
+            print(f"\n📐 {label} faces（実際: {len(tris)} faces, {len(vertices)} vertices）")
+
+            obj_path = os.path.join(workdir, f"grid_{label}.obj")
+            glb_path = os.path.join(workdir, f"grid_{label}.glb")
+            write_vertex_color_obj(obj_path, vertices, colors, tris)
+            write_textured_glb(glb_path, vertices, uv, tris)
+
+            # --- 頂点カラーOBJ ---
+            obj = {"faces": int(len(tris)), "vertices": int(len(vertices)), "file_bytes": os.path.getsize(obj_path)}
+            obj["srgb_to_linear"] = measure(lambda: ezrender.srgb_to_linear(colors), args.repeat)
+            scenes = []
+            obj["load_obj_linear"] = measure(lambda: scenes.append(ezrender.load_obj_linear(obj_path)[0]), args.repeat)
+            if scenes and not args.no_render:
+                bench_render_stages(scenes[-1], workdir, args.size, args.repeat, obj)
+
+            fixed_path = os.path.join(workdir, "fixed.obj")
+            def objfix():
+                mesh, linear = e3d_objfix.load_obj_with_vertex_colors(obj_path)
+                e3d_objfix.flip_mesh(mesh)
+                e3d_objfix.save_obj_with_vertex_colors(mesh, linear, fixed_path)
+            obj["e3d_objfix"] = measure(objfix, args.repeat)
+            lin_path = os.path.join(workdir, "linear.obj")
+            obj["srgb2linobj"] = measure(lambda: srgb2linobj.process_obj(obj_path, lin_path), args.repeat)
+            results[f"obj_{label}"] = obj
+
+            # --- テクスチャ付きGLB ---
+            glb = {"faces": int(len(tris)), "vertices": int(len(vertices)), "file_bytes": os.path.getsize(glb_path)}
+            scenes = []
+            glb["load_model"] = measure(lambda: scenes.append(ezrender.load_model(glb_path)), args.repeat)
+            if scenes and not args.no_render:
+                bench_render_stages(scenes[-1], workdir, args.size, args.repeat, glb)
+            results[f"glb_{label}"] = glb
+
+            for name in (f"obj_{label}", f"glb_{label}"):
+                for stage, value in results[name].items():
+                    if isinstance(value, dict):
+                        shown = f"{value['min'] * 1000:10.1f} ms" if "min" in value else f"skipped ({value['error']})"
+                        print(f"  {name:<12} {stage:<20} {shown}")
+    finally:
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "gl_platform": os.environ.get("PYOPENGL_PLATFORM"),
+            "render_size": list(args.size),
+            "repeat": args.repeat,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+# ベースラインとの比較表を表示し、許容範囲を超えて遅くなった段階の数を返す
+def compare(report, baseline, tolerance):
+    from tabulate import tabulate
+    rows = []
+    regressions = 0
+    for name, stages in report["results"].items():
+        base_stages = baseline.get("results", {}).get(name, {})
+        for stage, value in stages.items():
+            base = base_stages.get(stage)
+            if not isinstance(value, dict) or "min" not in value or not isinstance(base, dict) or "min" not in base:
+                continue
+            ratio = value["min"] / base["min"] if base["min"] > 0 else float("inf")
+            mark = ""
+            if ratio > 1.0 + tolerance:
+                mark = "🔺 slower"
+                regressions += 1
+            elif ratio < 1.0 - tolerance:
+                mark = "🔻 faster"
+            rows.append([name, stage, f"{base['min'] * 1000:.1f}", f"{value['min'] * 1000:.1f}", f"{ratio:.2f}x", mark])
+    print("\n📊 ベースラインとの比較（min, ms）")
+    print(tabulate(rows, headers=["case", "stage", "baseline", "current", "ratio", ""], tablefmt="github"))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="EzRender パイプラインのベンチマーク（結果は JSON）")
+    parser.add_argument("--sizes", default="10k,100k,1m",
+                        help="面数のリスト（例: 10k,100k,1m,5m、既定: 10k,100k,1m）")
+    parser.add_argument("--repeat", type=int, default=3, help="各段階の繰り返し回数（既定: 3、最小値を採用）")
+    parser.add_argument("--size", type=ezrender.parse_size, default=(512, 512), help="レンダリングサイズ（既定: 512x512）")
+    parser.add_argument("--no-render", action="store_true", help="OpenGL を使う段階を省略する")
+    parser.add_argument("--output", "-o", help="結果を書き出す JSON ファイル")
+    parser.add_argument("--baseline", help="比較対象の JSON ファイル")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="遅くなったとみなす比率（既定: 0.2 = 20%%）")
+    parser.add_argument("--workdir", help="合成メッシュの作業ディレクトリ（指定時は削除しない）")
+    parser.add_argument("--keep", action="store_true", help="一時作業ディレクトリを削除しない")
+    args = parser.parse_args()
+    args.sizes = [parse_count(s) for s in args.sizes.split(",") if s.strip()]
+
+    print(f"🖥️ OpenGL platform: {os.environ['PYOPENGL_PLATFORM']}")
+    report = run(args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 結果を保存: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.tolerance):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
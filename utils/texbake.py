@@ -0,0 +1,133 @@
+# 頂点カラー → テクスチャのベイク（NumPy 版）。vc2glb.py と vc2texeobj.py で共有しています。
+# pymeshlab の compute_texmap_from_color / transfer_attributes_to_texture_per_vertex の代わりに使えます。
+#
+# - UV 空間の各三角形について、外接矩形内のテクセル中心の重心座標をまとめて求め、
+#   三角形の内側のテクセルに3頂点の色を補間して書き込みます
+# - アトラスをタイルに分け、タイルごとにプロセスプールで並列にラスタライズします
+# - 最後に三角形の外側の数テクセルを周りの色で埋め（エッジの膨張）、
+#   バイリニア補間やミップマップで UV の継ぎ目に背景色がにじまないようにします
+
+import multiprocessing
+import os
+import numpy as np
+
+TILE_SIZE = 512
+DILATE = 4
+# 1回にまとめて処理する候補テクセル数。候補1つあたり 200 バイトほどの一時配列を使うので、1ワーカーあたり 50 MB 程度
+CHUNK_TEXELS = 1 << 18
+# jobs 省略時のプロセス数の上限（コア数の多いマシンでワーカーの一時配列がメモリを食い尽くさないように）
+MAX_DEFAULT_JOBS = 8
+
+# ワーカープロセスに1回だけ渡す三角形データ
+_uv = None
+_colors = None
+_bbox = None
+
+def _init_worker(uv, colors, bbox):
+    global _uv, _colors, _bbox
+    _uv, _colors, _bbox = uv, colors, bbox
+
+def _raster_tile(tile):
+    # タイル (x0, y0, x1, y1) に重なる三角形だけを、タイル内に切り詰めた外接矩形でラスタライズする
+    x0, y0, x1, y1 = tile
+    lo_x, lo_y, hi_x, hi_y = (np.clip(_bbox[:, 0], x0, None), np.clip(_bbox[:, 1], y0, None),
+                              np.clip(_bbox[:, 2], None, x1 - 1), np.clip(_bbox[:, 3], None, y1 - 1))
+    tris = np.flatnonzero((lo_x <= hi_x) & (lo_y <= hi_y))
+    rgb = np.zeros((y1 - y0, x1 - x0, _colors.shape[2]), dtype=np.float32)
+    mask = np.zeros((y1 - y0, x1 - x0), dtype=bool)
+    if len(tris) == 0:
+        return tile, rgb, mask
+
+    widths = (hi_x[tris] - lo_x[tris] + 1)
+    counts = widths * (hi_y[tris] - lo_y[tris] + 1)
+    # 候補テクセル数が CHUNK_TEXELS 程度になるように三角形をまとめて処理する
+    splits = np.flatnonzero(np.diff(np.cumsum(counts) // CHUNK_TEXELS)) + 1
+    for start, stop in zip(np.r_[0, splits], np.r_[splits, len(tris)]):
+        sel, n = tris[start:stop], counts[start:stop]
+        owner = np.repeat(np.arange(len(sel)), n)
+        local = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+        w = widths[start:stop][owner]
+        px = lo_x[sel][owner] + local % w
+        py = lo_y[sel][owner] + local // w
+
+        a, b, c = _uv[sel, 0][owner], _uv[sel, 1][owner], _uv[sel, 2][owner]
+        v0, v1 = b - a, c - a
+        d = v0[:, 0] * v1[:, 1] - v1[:, 0] * v0[:, 1]
+        v2x, v2y = px - a[:, 0], py - a[:, 1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            l1 = (v2x * v1[:, 1] - v1[:, 0] * v2y) / d
+            l2 = (v0[:, 0] * v2y - v2x * v0[:, 1]) / d
+        l0 = 1.0 - l1 - l2
+        eps = -1e-6
+        inside = (l0 >= eps) & (l1 >= eps) & (l2 >= eps) & (d != 0)
+
+        k = owner[inside]
+        col = (_colors[sel, 0][k] * l0[inside, None] + _colors[sel, 1][k] * l1[inside, None]
+               + _colors[sel, 2][k] * l2[inside, None])
+        ty, tx = py[inside] - y0, px[inside] - x0
+        rgb[ty, tx] = col
+        mask[ty, tx] = True
+    return tile, rgb, mask
+
+def dilate(rgb, mask, passes=DILATE):
+    # 未塗りのテクセルを、塗られた8近傍の平均色で1テクセルずつ広げる
+    height, width = mask.shape
+    for _ in range(passes):
+        if mask.all():
+            break
+        acc = np.zeros_like(rgb)
+        cnt = np.zeros(mask.shape, dtype=np.float32)
+        weighted = rgb * mask[..., None]
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                if dy == 0 and dx == 0:
+                    continue
+                dst = (slice(max(dy, 0), height + min(dy, 0)), slice(max(dx, 0), width + min(dx, 0)))
+                src = (slice(max(-dy, 0), height + min(-dy, 0)), slice(max(-dx, 0), width + min(-dx, 0)))
+                acc[dst] += weighted[src]
+                cnt[dst] += mask[src]
+        fill = ~mask & (cnt > 0)
+        rgb[fill] = acc[fill] / cnt[fill, None]
+        mask = mask | fill
+    return rgb, mask
+
+def bake_vertex_colors(uv_tri, color_tri, size, jobs=None, dilate_passes=DILATE, tile_size=TILE_SIZE):
+    """
+    uv_tri: (面数, 3, 2) 各面の角の UV（0〜1、v は上向き）
+    color_tri: (面数, 3, C) 各面の角の色（0〜1）
+    戻り値: (size, size, C) uint8 の画像（1行目が v=1 側）
+    """
+    uv_tri = np.asarray(uv_tri, dtype=np.float64)
+    color_tri = np.asarray(color_tri, dtype=np.float32)
+    # テクセル座標（テクセル i の中心が i）。画像の行は v の逆向き
+    uv = np.empty_like(uv_tri)
+    uv[..., 0] = uv_tri[..., 0] * size - 0.5
+    uv[..., 1] = (1.0 - uv_tri[..., 1]) * size - 0.5
+    bbox = np.stack([np.ceil(uv[..., 0].min(axis=1)), np.ceil(uv[..., 1].min(axis=1)),
+                     np.floor(uv[..., 0].max(axis=1)), np.floor(uv[..., 1].max(axis=1))], axis=1).astype(np.int64)
+    bbox[:, :2] = np.maximum(bbox[:, :2], 0)
+    bbox[:, 2:] = np.minimum(bbox[:, 2:], size - 1)
+
+    tiles = [(x, y, min(x + tile_size, size), min(y + tile_size, size))
+             for y in range(0, size, tile_size) for x in range(0, size, tile_size)]
+    jobs = min(jobs or min(os.cpu_count() or 1, MAX_DEFAULT_JOBS), len(tiles))
+    if multiprocessing.current_process().daemon:
+        # バッチ変換のワーカー（daemon プロセス）の中では子プロセスを作れないので、そのまま順に処理する
+        jobs = 1
+
+    rgb = np.zeros((size, size, color_tri.shape[2]), dtype=np.float32)
+    mask = np.zeros((size, size), dtype=bool)
+    if jobs > 1:
+        with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=(uv, color_tri, bbox)) as pool:
+            results = pool.imap_unordered(_raster_tile, tiles)
+            for (x0, y0, x1, y1), tile_rgb, tile_mask in results:
+                rgb[y0:y1, x0:x1] = tile_rgb
+                mask[y0:y1, x0:x1] = tile_mask
+    else:
+        _init_worker(uv, color_tri, bbox)
+        for (x0, y0, x1, y1), tile_rgb, tile_mask in map(_raster_tile, tiles):
+            rgb[y0:y1, x0:x1] = tile_rgb
+            mask[y0:y1, x0:x1] = tile_mask
+
+    rgb, _ = dilate(rgb, mask, dilate_passes)
+    return np.clip(np.rint(rgb * 255.0), 0, 255).astype(np.uint8)
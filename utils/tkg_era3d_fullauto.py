@@ -6,13 +6,17 @@ tkg_era3d_fullauto.py - Era3D全自動処理スクリプト
 概要:
 このスクリプトは Era3D の処理を自動で実行します：
   1. 背景除去（foreground_segment.py* または rembg を使用）
-     *... https://github.com/liuyuan-pal/SyncDreamer の foreground_segment.py  
+     *... https://github.com/liuyuan-pal/SyncDreamer の foreground_segment.py
   2. 多視点画像生成（test_mvdiffusion_unclip.py）
   3. 画像プレビュー（timg）
   4. Instant-NSR によるメッシュ再構成
   5. メッシュ修復（e3d_objfix.py、未取得なら自動ダウンロード）
   6. 最新出力ディレクトリへのシンボリックリンク更新
 
+複数の画像を渡すと、段階ごとに使う資源（GPU / CPU / 端末）の同時実行数を守りながら並行に処理します。
+たとえば画像Aの Instant-NSR（GPU）の実行中に、画像Bの背景除去や画像Cのメッシュ修復（CPU）を進めます。
+最後に段階ごとの処理時間を表示します。
+
 必要な環境:
     - Conda 環境 `era3d`（miniconda3/envs/era3d にあると仮定）
     - timg（画像プレビュー用）
@@ -21,17 +25,30 @@ tkg_era3d_fullauto.py - Era3D全自動処理スクリプト
 使い方:
   (1) コード中の HOME_DIR，CONDA_ENV_DIR，ERA3D_DIR を適宜修正
   (2) python tkg_era3d_fullauto.py --input ./input.png --output-name output_base
-    --input        背景除去対象の入力画像（PNGなど）
-    --output-name  出力に使うベース名（例：xxx → xxx.obj, xxx.png, ...）
+    --input        背景除去対象の入力画像（PNGなど）。複数指定可（ベース名は各画像のファイル名）
+    --output-name  出力に使うベース名（例：xxx → xxx.obj, xxx.png, ...）。入力が1枚のときのみ
+    --gpu-jobs     GPU を使う段階（多視点画像生成・Instant-NSR）の同時実行数（既定: 1）
+    --cpu-jobs     CPU の段階（背景除去・メッシュ修復）の同時実行数（既定: 4）
+    --commands     各段階のコマンドを差し替える JSON ファイル（動作確認用のスタブなど）
+    --log-dir      各段階の出力を <log-dir>/<ベース名>/<段階>.log に保存（複数入力時の既定: ERA3D_DIR/logs）
+
+  例: python tkg_era3d_fullauto.py -i images/*.png --cpu-jobs 8 --no-preview
+
+  --commands の例（各段階のコマンドは {input} {name} {foreground} {examples} {mv_dir}
+  {recon_base} {recon_obj} {fixed_obj} {python} {seed} {crop_size} などで組み立てる）:
+    {"segment": "cp {input} {foreground}", "mvdiffusion": "mkdir -p {mv_dir} && cp {foreground} {mv_dir}/"}
 
 注意:
-    - examples ディレクトリは毎回初期化されます。
+    - 各段階の入力（画像・パラメータ・設定ファイル・前段の出力）のハッシュと出力を
+      ERA3D_DIR/stage_cache/<ベース名>.json に記録し、再実行時は入力が同じで出力も残っている段階を飛ばします。
+      途中で失敗しても、次回は失敗した段階から再開します。--force-stage nsr などで特定の段階だけ再実行できます。
+    - examples/<ベース名>/ は背景除去を実行するときに初期化されます。
     - CUDA + PyTorch が動作する GPU 環境が前提です。
     - launch.py 実行時の出力先ディレクトリは日付付きで自動生成されます。
 
 GitHub:
     https://github.com/takago/EzRender
-    
+
 """
 
 import subprocess
@@ -39,8 +56,14 @@ import os
 import sys
 import glob
 import argparse
+import hashlib
+import json
+import shlex
 import shutil
+import threading
 import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 
 # ==============================
 # ユーザ環境設定（必要に応じて変更）
@@ -50,133 +73,425 @@ CONDA_ENV_DIR = os.path.join(HOME_DIR, "miniconda3/envs/era3d")
 ERA3D_DIR = os.path.join(HOME_DIR, "Era3D")
 # ==============================
 
-# CUDA/Conda環境のパス設定
-os.environ["PATH"] = os.path.join(CONDA_ENV_DIR, "bin") + ":" + os.environ.get("PATH", "")
-os.environ["LD_LIBRARY_PATH"] = os.path.join(CONDA_ENV_DIR, "lib") + ":" + os.environ.get("LD_LIBRARY_PATH", "")
-
-print("🔧 環境変数を設定しました:")
-print("   PATH =", os.environ["PATH"].split(":")[0], "...")
-print("   LD_LIBRARY_PATH =", os.environ["LD_LIBRARY_PATH"].split(":")[0], "...")
-
-# 引数解析
-parser = argparse.ArgumentParser(description="Era3D パイプライン全自動スクリプト")
-parser.add_argument("--input", "-i", required=True, help="入力画像（PNGなど）へのパス")
-parser.add_argument("--output-name", "-o", required=True, help="出力メッシュ等のベース名")
-args = parser.parse_args()
-
-# パスと変数設定
-CONDA_PYTHON = os.path.join(CONDA_ENV_DIR, "bin/python")
-EXAMPLES_DIR = os.path.join(ERA3D_DIR, "examples")
-INPUT_IMAGE_PATH = args.input
-OUTPUT_NAME = args.output_name
-MV_RES_DIR = os.path.join(ERA3D_DIR, "mv_res")
-NSR_DIR = os.path.join(ERA3D_DIR, "instant-nsr-pl")
-RECON_DIR = os.path.join(NSR_DIR, "recon")
 CONFIG_UNCLIP = "configs/test_unclip-512-6view.yaml"
 CONFIG_NSR = "configs/neuralangelo-ortho-wmask.yaml"
+MANIFEST_VERSION = 1
+OBJFIX_URL = "https://raw.githubusercontent.com/takago/EzRender/refs/heads/main/utils/e3d_objfix.py"
+
+# 各段階のコマンド（--commands で差し替え可能）。{...} は実行時にパスやパラメータで置き換える
+COMMANDS = {
+    "segment": "{python} {foreground_script} --input {input} --output {foreground}",
+    "segment_rembg": "rembg i {input} {foreground}",
+    "mvdiffusion": (
+        "{python} test_mvdiffusion_unclip.py "
+        "--config {config_unclip} "
+        "pretrained_model_name_or_path='pengHTYX/MacLab-Era3D-512-6view' "
+        "validation_dataset.crop_size={crop_size} "
+        "validation_dataset.root_dir={examples} "
+        "seed={seed} save_dir='mv_res' save_mode='rgb'"
+    ),
+    "preview": "timg --grid 6x1 {mv_dir}/color_*.png",
+    "nsr": (
+        "{python} launch.py "
+        "--config {config_nsr} "
+        "--gpu 0 "
+        "--train dataset.root_dir=../mv_res dataset.scene={name} "
+        "--exp_dir recon"
+    ),
+    "objfix": "{python} {objfix_script} {recon_obj} -o {fixed_obj}",
+}
 
-def run(cmd, cwd=None, label=None):
+def run(cmd, cwd=None, label=None, log=None):
     if label:
         print(f"\n🟢 [{label}] 開始")
     print(f"[RUN] {cmd}")
     start = time.perf_counter()
-    subprocess.run(cmd, shell=True, check=True, cwd=cwd)
+    if log is None:
+        subprocess.run(cmd, shell=True, check=True, cwd=cwd)
+    else:
+        # 並行実行時は出力が混ざらないよう、段階ごとのログファイルへ書き出す
+        with open(log, "w") as f:
+            subprocess.run(cmd, shell=True, check=True, cwd=cwd, stdout=f, stderr=subprocess.STDOUT)
     end = time.perf_counter()
     if label:
         print(f"✅ [{label}] 完了（{end - start:.2f} 秒）")
 
-# examplesディレクトリの初期化
-if os.path.exists(EXAMPLES_DIR):
-    print(f"\n🧹 既存の {EXAMPLES_DIR} を削除します")
-    shutil.rmtree(EXAMPLES_DIR)
-os.makedirs(EXAMPLES_DIR, exist_ok=True)
-print(f"📁 {EXAMPLES_DIR} を再作成しました")
-
-# 背景除去
-foreground_script = os.path.join(ERA3D_DIR, "foreground_segment.py")
-output_foreground_path = os.path.join(EXAMPLES_DIR, f"{OUTPUT_NAME}.png")
-
-if os.path.exists(foreground_script):
-    run(
-        f"{CONDA_PYTHON} {foreground_script} --input {INPUT_IMAGE_PATH} --output {output_foreground_path}",
-        cwd=ERA3D_DIR,
-        label="背景除去 (foreground_segment.py)"
-    )
-else:
-    print("\n⚠️ foreground_segment.py が見つかりません。rembg による背景除去を試みます。")
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def files_under(path):
+    return sorted(p for p in glob.glob(os.path.join(path, "**", "*"), recursive=True) if os.path.isfile(p))
+
+def load_manifest(path):
     try:
-        run(f"rembg i {INPUT_IMAGE_PATH} {output_foreground_path}", label="背景除去 (rembg)")
-    except subprocess.CalledProcessError:
-        print("❌ rembg の実行に失敗しました。背景除去を中断します。")
-        sys.exit(1)
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"version": MANIFEST_VERSION, "stages": {}}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {"version": MANIFEST_VERSION, "stages": {}}
+    return manifest
+
+def save_manifest(path, manifest):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+def outputs_valid(outputs):
+    # 記録した出力ファイルがすべて残っていて、中身も記録時と同じか
+    if not outputs:
+        return False
+    for path, digest in outputs.items():
+        if not os.path.isfile(path) or file_digest(path) != digest:
+            return False
+    return True
+
+class ImageJob:
+    # 入力画像1枚ぶんの作業ディレクトリと出力パス
+    def __init__(self, input_path, name, pipeline):
+        self.input = os.path.abspath(input_path)
+        self.name = name
+        self.examples = os.path.join(pipeline.examples_dir, name)
+        self.foreground = os.path.join(self.examples, f"{name}.png")
+        self.mv_dir = os.path.join(pipeline.era3d_dir, "mv_res", name)
+        self.recon_base = os.path.join(pipeline.nsr_dir, "recon", name)
+        self.latest_dir = None
+        self.log_dir = os.path.join(pipeline.log_dir, name) if pipeline.log_dir else None
+        self.manifest_path = os.path.join(pipeline.cache_dir, f"{name}.json")
+        self.manifest = load_manifest(self.manifest_path)
+
+    def recon_obj(self):
+        return os.path.join(self.latest_dir, f"refine_{self.name}.obj")
+
+    def fixed_obj(self):
+        return os.path.join(self.latest_dir, f"refine_{self.name}_fixed.obj")
+
+class Era3DPipeline:
+    # 段階の定義（名前, 使う資源, 処理）と、段階で共有する設定
+    def __init__(self, args, commands):
+        self.era3d_dir = os.path.abspath(args.era3d_dir)
+        self.examples_dir = os.path.join(self.era3d_dir, "examples")
+        self.nsr_dir = os.path.join(self.era3d_dir, "instant-nsr-pl")
+        self.python = args.python
+        self.seed = args.seed
+        self.crop_size = args.crop_size
+        self.log_dir = args.log_dir
+        self.cache_dir = args.cache_dir or os.path.join(self.era3d_dir, "stage_cache")
+        self.force = set(args.force_stage or [])
+        self.commands = commands
+        self.foreground_script = os.path.join(self.era3d_dir, "foreground_segment.py")
+        self.objfix_script = os.path.join(self.era3d_dir, "e3d_objfix.py")
+        self.link_lock = threading.Lock()
+        # (キー, 表示名, 使う資源, 処理)。プレビュー以外は結果をマニフェストに記録し、入力が同じなら再利用する
+        self.stages = [
+            ("segment", "背景除去", "cpu", self.cached("segment", "背景除去", self.stage_segment)),
+            ("mvdiffusion", "多視点画像生成", "gpu", self.cached("mvdiffusion", "多視点画像生成", self.stage_mvdiffusion)),
+            ("nsr", "Instant-NSR 実行", "gpu", self.cached("nsr", "Instant-NSR 実行", self.stage_nsr)),
+            ("objfix", "修復処理", "cpu", self.cached("objfix", "修復処理", self.stage_objfix)),
+        ]
+        if not args.no_preview:
+            self.stages.insert(2, ("preview", "多視点画像プレビュー", "tty", self.stage_preview))
+
+    def command(self, key, job):
+        values = {
+            "python": self.python, "seed": self.seed, "crop_size": self.crop_size,
+            "config_unclip": CONFIG_UNCLIP, "config_nsr": CONFIG_NSR,
+            "foreground_script": self.foreground_script, "objfix_script": self.objfix_script,
+            "input": job.input, "name": job.name, "foreground": job.foreground, "examples": job.examples,
+            "mv_dir": job.mv_dir, "recon_base": job.recon_base,
+            "recon_obj": job.recon_obj() if job.latest_dir else "", "fixed_obj": job.fixed_obj() if job.latest_dir else "",
+        }
+        quoted = {k: shlex.quote(str(v)) if isinstance(v, str) and v else v for k, v in values.items()}
+        return self.commands[key].format(**quoted)
+
+    def config_digest(self, config, cwd):
+        path = os.path.join(cwd, config)
+        return file_digest(path) if os.path.isfile(path) else None
+
+    def stage_inputs(self, key, job):
+        # 段階の結果を左右するもの（コマンド・パラメータ・設定ファイル・入力ファイルの中身）
+        if key == "segment":
+            use_script = os.path.exists(self.foreground_script)
+            command = self.commands["segment" if use_script else "segment_rembg"]
+            files = {"input": job.input}
+            if use_script:
+                files["foreground_script"] = self.foreground_script
+            params = {}
+        elif key == "mvdiffusion":
+            command = self.commands[key]
+            files = {"foreground": job.foreground}
+            params = {"seed": self.seed, "crop_size": self.crop_size, "config": CONFIG_UNCLIP,
+                      "config_digest": self.config_digest(CONFIG_UNCLIP, self.era3d_dir)}
+        elif key == "nsr":
+            command = self.commands[key]
+            files = {os.path.relpath(p, job.mv_dir): p for p in files_under(job.mv_dir)}
+            params = {"config": CONFIG_NSR, "config_digest": self.config_digest(CONFIG_NSR, self.nsr_dir)}
+        else:
+            command = self.commands[key]
+            files = {"recon_obj": job.recon_obj()}
+            if "{objfix_script}" in command:
+                files["objfix_script"] = self.objfix_script
+            params = {}
+        # ファイルは置き場所ではなく中身で比べる（NSR の出力先は実行ごとに日付付きで変わるため）
+        return {"stage": key, "command": command, "params": params,
+                "files": {name: file_digest(path) for name, path in files.items()}}
+
+    def stage_outputs(self, key, job):
+        if key == "segment":
+            files = [job.foreground]
+        elif key == "mvdiffusion":
+            files = files_under(job.mv_dir)
+        elif key == "nsr":
+            files = [job.recon_obj()]
+        else:
+            files = [job.fixed_obj()]
+        return {p: file_digest(p) for p in files if os.path.isfile(p)}
+
+    def cached(self, key, label, fn):
+        # 入力のハッシュがマニフェストと同じで出力も残っていれば段階を飛ばす（--force-stage で強制再実行）
+        def run_cached(job):
+            digest = hashlib.sha256(json.dumps(self.stage_inputs(key, job), sort_keys=True).encode()).hexdigest()
+            entry = job.manifest["stages"].get(key)
+            forced = key in self.force or "all" in self.force
+            if not forced and entry and entry["key"] == digest and outputs_valid(entry["outputs"]):
+                if entry.get("latest_dir"):
+                    job.latest_dir = entry["latest_dir"]
+                print(f"\n⏭️ [{job.name}: {label}] 前回の結果を再利用します（{entry['finished']}）")
+                return True
+            start = time.perf_counter()
+            fn(job)
+            outputs = self.stage_outputs(key, job)
+            if not outputs:
+                raise RuntimeError(f"{label} の出力が見つかりません")
+            job.manifest["stages"][key] = {
+                "key": digest, "outputs": outputs, "latest_dir": job.latest_dir,
+                "seconds": round(time.perf_counter() - start, 2), "finished": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            save_manifest(job.manifest_path, job.manifest)
+            return False
+        return run_cached
+
+    def run_stage(self, key, job, label, cwd):
+        log = os.path.join(job.log_dir, f"{key}.log") if job.log_dir else None
+        run(self.command(key, job), cwd=cwd, label=f"{job.name}: {label}", log=log)
+
+    def prepare(self, jobs):
+        # 全画像で共有するものは、並行処理を始める前に1回だけ用意する
+        if "{objfix_script}" in self.commands["objfix"] and not os.path.exists(self.objfix_script):
+            print(f"\n🌐 e3d_objfix.py が見つかりません。GitHubからダウンロードを試みます...")
+            run(f"wget -O {shlex.quote(self.objfix_script)} {OBJFIX_URL}", label="e3d_objfix.py ダウンロード")
+        if not os.path.exists(self.foreground_script):
+            print("\n⚠️ foreground_segment.py が見つかりません。rembg による背景除去を試みます。")
+        for job in jobs:
+            if job.log_dir:
+                os.makedirs(job.log_dir, exist_ok=True)
 
-# 多視点画像生成
-run(
-    f"{CONDA_PYTHON} test_mvdiffusion_unclip.py "
-    f"--config {CONFIG_UNCLIP} "
-    f"pretrained_model_name_or_path='pengHTYX/MacLab-Era3D-512-6view' "
-    f"validation_dataset.crop_size=420 "
-    f"validation_dataset.root_dir={EXAMPLES_DIR} "
-    f"seed=600 save_dir='mv_res' save_mode='rgb'",
-    cwd=ERA3D_DIR,
-    label="多視点画像生成"
-)
-
-# timg プレビュー
-color_pattern = os.path.join(MV_RES_DIR, OUTPUT_NAME, "color_*.png")
-print(f"\n🖼️ timg によるプレビュー表示: {color_pattern}")
-try:
-    run(f"timg --grid 6x1 {color_pattern}", label="多視点画像プレビュー")
-except subprocess.CalledProcessError:
-    print("⚠️ timg 実行中にエラーが発生しました（GUI環境がない可能性あり）")
-
-# Instant-NSR 実行
-run(
-    f"{CONDA_PYTHON} launch.py "
-    f"--config {CONFIG_NSR} "
-    f"--gpu 0 "
-    f"--train dataset.root_dir=../mv_res dataset.scene={OUTPUT_NAME} "
-    f"--exp_dir recon",
-    cwd=NSR_DIR,
-    label="Instant-NSR 実行"
-)
-
-# 最新の @ ディレクトリを取得
-output_base = os.path.join(RECON_DIR, OUTPUT_NAME)
-candidates = sorted(glob.glob(f"{output_base}/@*/"), reverse=True)
-if not candidates:
-    print("❌ NSR出力ディレクトリが見つかりません")
-    sys.exit(1)
-
-latest_dir = os.path.join(candidates[0], "save")
-print(f"\n✅ 最新出力ディレクトリ: {latest_dir}")
-
-# e3d_objfix.py の存在チェックとダウンロード
-objfix_script = os.path.join(ERA3D_DIR, "e3d_objfix.py")
-if not os.path.exists(objfix_script):
-    print(f"\n🌐 e3d_objfix.py が見つかりません。GitHubからダウンロードを試みます...")
+    def stage_segment(self, job):
+        # examples/<ベース名>/ の初期化（多視点画像生成はこのディレクトリの画像だけを処理する）
+        if os.path.exists(job.examples):
+            shutil.rmtree(job.examples)
+        os.makedirs(job.examples, exist_ok=True)
+        if os.path.exists(self.foreground_script):
+            self.run_stage("segment", job, "背景除去 (foreground_segment.py)", self.era3d_dir)
+        else:
+            self.run_stage("segment_rembg", job, "背景除去 (rembg)", None)
+
+    def stage_mvdiffusion(self, job):
+        self.run_stage("mvdiffusion", job, "多視点画像生成", self.era3d_dir)
+
+    def stage_preview(self, job):
+        try:
+            self.run_stage("preview", job, "多視点画像プレビュー", None)
+        except subprocess.CalledProcessError:
+            print("⚠️ timg 実行中にエラーが発生しました（GUI環境がない可能性あり）")
+
+    def stage_nsr(self, job):
+        self.run_stage("nsr", job, "Instant-NSR 実行", self.nsr_dir)
+        # 最新の @ ディレクトリを取得
+        candidates = sorted(glob.glob(f"{job.recon_base}/@*/"), reverse=True)
+        if not candidates:
+            raise RuntimeError("NSR出力ディレクトリが見つかりません")
+        job.latest_dir = os.path.join(candidates[0], "save")
+        print(f"\n✅ [{job.name}] 最新出力ディレクトリ: {job.latest_dir}")
+
+    def stage_objfix(self, job):
+        self.run_stage("objfix", job, "修復処理", self.era3d_dir)
+        print(f"🛠️ 修復済みモデルを保存: {job.fixed_obj()}")
+
+    def update_link(self, job):
+        # シンボリックリンク更新（複数画像のときは最後に完了したもの）
+        link_path = os.path.join(self.era3d_dir, "latest_output")
+        with self.link_lock:
+            if os.path.islink(link_path) or os.path.exists(link_path):
+                os.unlink(link_path)
+            os.symlink(job.latest_dir, link_path)
+        print(f"🔗 最新出力へのリンクを作成: {link_path} -> {job.latest_dir}")
+
+def pad(text, width):
+    # 全角文字を2桁として左寄せする
+    used = sum(2 if unicodedata.east_asian_width(c) in "WF" else 1 for c in text)
+    return text + " " * max(0, width - used)
+
+class StageScheduler:
+    # 資源（gpu / cpu / tty）ごとのスレッドプールで段階を実行する。
+    # ある画像の段階が終わると、その画像の次の段階を対応する資源のキューへ積む（各キューは投入順）。
+    def __init__(self, stages, limits, on_done=None):
+        self.stages = stages
+        self.on_done = on_done
+        self.pools = {resource: ThreadPoolExecutor(limit, thread_name_prefix=resource) for resource, limit in limits.items()}
+        self.lock = threading.Lock()
+        self.timings = []    # (画像名, 段階名, 秒, 成功したか, 前回の結果を再利用したか)
+        self.failed = {}     # 画像名 -> エラー
+        self.remaining = 0
+        self.all_done = threading.Event()
+
+    def run(self, jobs):
+        self.remaining = len(jobs)
+        if not jobs:
+            return
+        for job in jobs:
+            self.submit(job, 0)
+        try:
+            while not self.all_done.wait(0.5):
+                pass
+        except KeyboardInterrupt:
+            print("\n🛑 中断します（実行中の段階の終了を待ちます）")
+            for pool in self.pools.values():
+                pool.shutdown(wait=True, cancel_futures=True)
+            raise
+        for pool in self.pools.values():
+            pool.shutdown(wait=True)
+
+    def submit(self, job, index):
+        if index == len(self.stages):
+            try:
+                if self.on_done is not None:
+                    self.on_done(job)
+            except Exception as e:
+                print(f"❌ [{job.name}] {e}")
+                self.finish(job, e)
+                return
+            self.finish(job)
+            return
+        _, _, resource, _ = self.stages[index]
+        self.pools[resource].submit(self.run_stage, job, index)
+
+    def run_stage(self, job, index):
+        _, label, _, fn = self.stages[index]
+        start = time.perf_counter()
+        try:
+            reused = bool(fn(job))
+        except Exception as e:
+            with self.lock:
+                self.timings.append((job.name, label, time.perf_counter() - start, False, False))
+            print(f"❌ [{job.name}] {label} に失敗しました: {e}")
+            self.finish(job, e)
+            return
+        with self.lock:
+            self.timings.append((job.name, label, time.perf_counter() - start, True, reused))
+        self.submit(job, index + 1)
+
+    def finish(self, job, error=None):
+        with self.lock:
+            if error is not None:
+                self.failed[job.name] = error
+            self.remaining -= 1
+            if self.remaining == 0:
+                self.all_done.set()
+
+    def print_summary(self, elapsed):
+        print("\n⏱️ 段階ごとの処理時間")
+        print(f"  {pad('段階', 22)}  件数   合計[s]   平均[s]   最大[s]  失敗  再利用")
+        busy = 0.0
+        for _, label, _, _ in self.stages:
+            rows = [t for t in self.timings if t[1] == label]
+            if not rows:
+                continue
+            seconds = [t[2] for t in rows]
+            busy += sum(seconds)
+            failed = sum(1 for t in rows if not t[3])
+            reused = sum(1 for t in rows if t[4])
+            print(f"  {pad(label, 22)} {len(rows):>5} {sum(seconds):9.1f} {sum(seconds) / len(rows):9.1f} {max(seconds):9.1f}"
+                  f" {failed:>5} {reused:>7}")
+        # 各段階を1つずつ順番に実行した場合との比較
+        print(f"  経過時間 {elapsed:.1f} 秒（段階の合計 {busy:.1f} 秒、並行度 {busy / elapsed if elapsed > 0 else 0:.2f}）")
+
+def image_jobs(args, pipeline):
+    if args.output_name and len(args.input) > 1:
+        sys.exit("❌ --output-name は入力画像が1枚のときだけ指定できます")
+    jobs = []
+    for path in args.input:
+        if not os.path.isfile(path):
+            sys.exit(f"❌ 入力画像が見つかりません: {path}")
+        name = args.output_name or os.path.splitext(os.path.basename(path))[0]
+        if any(job.name == name for job in jobs):
+            sys.exit(f"❌ ベース名が重複しています: {name}")
+        jobs.append(ImageJob(path, name, pipeline))
+    return jobs
+
+def main():
+    # 引数解析
+    parser = argparse.ArgumentParser(description="Era3D パイプライン全自動スクリプト")
+    parser.add_argument("--input", "-i", required=True, nargs="+", help="入力画像（PNGなど）へのパス（複数可）")
+    parser.add_argument("--output-name", "-o", help="出力メッシュ等のベース名（入力が1枚のとき。既定: 入力のファイル名）")
+    parser.add_argument("--gpu-jobs", type=int, default=1, help="GPU の段階の同時実行数（既定: 1）")
+    parser.add_argument("--cpu-jobs", type=int, default=4, help="CPU の段階の同時実行数（既定: 4）")
+    parser.add_argument("--no-preview", action="store_true", help="timg による多視点画像のプレビューを行わない")
+    parser.add_argument("--seed", type=int, default=600, help="多視点画像生成のシード（既定: 600）")
+    parser.add_argument("--crop-size", type=int, default=420, help="多視点画像生成の crop_size（既定: 420）")
+    parser.add_argument("--era3d-dir", default=ERA3D_DIR, help=f"Era3D のディレクトリ（既定: {ERA3D_DIR}）")
+    parser.add_argument("--python", default=os.path.join(CONDA_ENV_DIR, "bin/python"), help="Era3D を実行する Python")
+    parser.add_argument("--commands", help="段階ごとのコマンドを上書きする JSON ファイル")
+    parser.add_argument("--cache-dir", help="段階ごとの結果を記録するマニフェストのディレクトリ（既定: ERA3D_DIR/stage_cache）")
+    parser.add_argument("--force-stage", action="append", choices=["segment", "mvdiffusion", "nsr", "objfix", "all"],
+                        help="入力が変わっていなくても再実行する段階（複数回指定可、all で全段階）")
+    parser.add_argument("--log-dir", help="段階ごとの出力を保存するディレクトリ（複数入力時の既定: ERA3D_DIR/logs）")
+    args = parser.parse_args()
+    if args.gpu_jobs < 1 or args.cpu_jobs < 1:
+        parser.error("--gpu-jobs と --cpu-jobs は 1 以上を指定してください")
+    if args.log_dir is None and len(args.input) > 1:
+        args.log_dir = os.path.join(args.era3d_dir, "logs")
+
+    # CUDA/Conda環境のパス設定
+    os.environ["PATH"] = os.path.join(CONDA_ENV_DIR, "bin") + ":" + os.environ.get("PATH", "")
+    os.environ["LD_LIBRARY_PATH"] = os.path.join(CONDA_ENV_DIR, "lib") + ":" + os.environ.get("LD_LIBRARY_PATH", "")
+
+    print("🔧 環境変数を設定しました:")
+    print("   PATH =", os.environ["PATH"].split(":")[0], "...")
+    print("   LD_LIBRARY_PATH =", os.environ["LD_LIBRARY_PATH"].split(":")[0], "...")
+
+    commands = dict(COMMANDS)
+    if args.commands:
+        with open(args.commands) as f:
+            commands.update(json.load(f))
+
+    pipeline = Era3DPipeline(args, commands)
+    jobs = image_jobs(args, pipeline)
     try:
-        run(
-            f"wget -O {objfix_script} https://raw.githubusercontent.com/takago/EzRender/refs/heads/main/utils/e3d_objfix.py",
-            label="e3d_objfix.py ダウンロード"
-        )
+        pipeline.prepare(jobs)
     except subprocess.CalledProcessError:
         print("❌ e3d_objfix.py のダウンロードに失敗しました。修復処理をスキップします。")
         sys.exit(1)
 
-# 修復処理
-fixed_output_path = os.path.join(latest_dir, f"refine_{OUTPUT_NAME}_fixed.obj")
-run(
-    f"{CONDA_PYTHON} {objfix_script} {os.path.join(latest_dir, f'refine_{OUTPUT_NAME}.obj')} "
-    f"-o {fixed_output_path}",
-    cwd=ERA3D_DIR,
-    label="修復処理"
-)
-print(f"🛠️ 修復済みモデルを保存: {fixed_output_path}")
-
-# シンボリックリンク更新
-link_path = os.path.join(ERA3D_DIR, "latest_output")
-if os.path.islink(link_path) or os.path.exists(link_path):
-    os.unlink(link_path)
-os.symlink(latest_dir, link_path)
-print(f"🔗 最新出力へのリンクを作成: {link_path} -> {latest_dir}")
+    print(f"\n📋 {len(jobs)} 枚を処理します（GPU {args.gpu_jobs} 並列 / CPU {args.cpu_jobs} 並列）")
+    scheduler = StageScheduler(pipeline.stages, {"gpu": args.gpu_jobs, "cpu": args.cpu_jobs, "tty": 1},
+                               on_done=pipeline.update_link)
+    start = time.perf_counter()
+    scheduler.run(jobs)
+    scheduler.print_summary(time.perf_counter() - start)
+
+    if scheduler.failed:
+        print(f"\n❌ {len(scheduler.failed)} 枚が失敗しました: {', '.join(scheduler.failed)}")
+        if args.log_dir:
+            print(f"   ログ: {args.log_dir}")
+        sys.exit(1)
+    print(f"\n🎉 {len(jobs)} 枚すべて完了しました")
+
+if __name__ == "__main__":
+    main()
@@ -2,74 +2,93 @@
 
 import argparse
 import os
+import shutil
+import sys
+import tempfile
 import numpy as np
-import trimesh
-import xatlas
-import pymeshlab
+
+# pymeshlab / xatlas / trimesh は import が重いので、使う関数の中で import する（--help を速くするため）
+#
+# 各段階の間はメッシュを NumPy 配列のまま受け渡し、OBJ テキストへの書き出し・再読み込みはしない。
+# pymeshlab からテクスチャ画像を取り出すための一時ファイルだけは、実行ごとの専用ディレクトリに作る
+# （同じディレクトリで複数の変換を同時に走らせても衝突しない）。
+
+TEXTURE_NAME = "baked_texture.png"
 
 def simplify_mesh(input_obj, target_faces):
+    import pymeshlab
     ms = pymeshlab.MeshSet()
     ms.load_new_mesh(input_obj)
     ms.apply_coord_laplacian_smoothing()
     ms.meshing_decimation_quadric_edge_collapse(targetfacenum=target_faces)
-    temp_obj = "temp_simplified.obj"
-    ms.save_current_mesh(temp_obj)
-    return temp_obj
-
-def uv_unwrap_and_add_colors(obj_file):
-    mesh = trimesh.load_mesh(obj_file)
-    vmapping, indices, uvs = xatlas.parametrize(mesh.vertices, mesh.faces)
-    vertices = mesh.vertices[vmapping]
-    faces = indices
-
-    if hasattr(mesh.visual, "vertex_colors") and mesh.visual.vertex_colors is not None:
-        colors = mesh.visual.vertex_colors[vmapping][:, :3]  # RGBのみ
-        obj_lines = []
-        for v, c in zip(vertices, colors):
-            obj_lines.append("v {:.6f} {:.6f} {:.6f} {} {} {}".format(*v, *c))
-    else:
+    mesh = ms.current_mesh()
+    if not mesh.has_vertex_color():
         raise ValueError("頂点カラー情報が見つかりません")
-
-    for uv in uvs:
-        obj_lines.append("vt {:.6f} {:.6f}".format(*uv))
-    for f in faces:
-        f1, f2, f3 = f + 1
-        obj_lines.append(f"f {f1}/{f1} {f2}/{f2} {f3}/{f3}")
-
-    temp_obj = "temp_uvcolor.obj"
-    with open(temp_obj, "w") as f:
-        f.write("\n".join(obj_lines))
-    return temp_obj
-
-def bake_texture(obj_file, texture_file, size):
+    # (頂点 (n, 3) float64, 面 (m, 3) int32, 頂点カラー (n, 4) RGBA float64 [0-1], 頂点法線 (n, 3) float64)
+    return mesh.vertex_matrix(), mesh.face_matrix(), mesh.vertex_color_matrix(), mesh.vertex_normal_matrix()
+
+def uv_unwrap(vertices, faces):
+    import xatlas
+    # vmapping: 展開後の各頂点が元のどの頂点か、indices: 展開後の面、uvs: 展開後の頂点ごとの UV
+    vmapping, indices, uvs = xatlas.parametrize(vertices, faces)
+    return vmapping, indices.astype(np.int32), uvs
+
+def bake_texture(vertices, faces, colors, uvs, size, workdir, baker="native", jobs=None, dilate=4):
+    from PIL import Image
+    if baker == "native":
+        from texbake import bake_vertex_colors
+        return Image.fromarray(bake_vertex_colors(uvs[faces], colors[faces][..., :3], size, jobs, dilate))
+
+    import pymeshlab
+    # UV は面の角（wedge）ごとに渡す（compute_texmap_from_color は wedge の UV を使う）
+    mesh = pymeshlab.Mesh(vertex_matrix=vertices, face_matrix=faces, v_color_matrix=colors,
+                          w_tex_coords_matrix=uvs[faces].reshape(-1, 2))
     ms = pymeshlab.MeshSet()
-    ms.load_new_mesh(obj_file)
-    ms.compute_texmap_from_color(textname=texture_file, textw=size, texth=size, pullpush=False)
-
-    baked_obj = "temp_baked.obj"
-    ms.save_current_mesh(baked_obj)
-
-    # Meshlabが生成する .obj.mtl を .mtl にリネーム
-    baked_mtl_src = baked_obj + ".mtl"
-    baked_mtl_dst = "temp_baked.mtl"
-    if os.path.exists(baked_mtl_src):
-        os.rename(baked_mtl_src, baked_mtl_dst)
-
-        # OBJ内のmtllib行を修正
-        with open(baked_obj, "r") as f:
-            lines = f.readlines()
-        with open(baked_obj, "w") as f:
-            for line in lines:
-                if line.strip().startswith("mtllib "):
-                    f.write("mtllib temp_baked.mtl\n")
-                else:
-                    f.write(line)
-
-    return baked_obj
-
-def convert_to_glb(obj_file, output_glb):
-    mesh = trimesh.load(obj_file)
-    mesh.export(output_glb)
+    ms.add_mesh(mesh)
+    ms.compute_texmap_from_color(textname=TEXTURE_NAME, textw=size, texth=size, pullpush=False)
+
+    texture_path = os.path.join(workdir, TEXTURE_NAME)
+    baked = ms.current_mesh()
+    if hasattr(baked, "texture"):
+        baked.texture(TEXTURE_NAME).save(texture_path)
+    else:
+        # Mesh.texture() の無い古い pymeshlab では、メッシュと一緒に保存してテクスチャを書き出させる
+        ms.save_current_mesh(os.path.join(workdir, "baked.obj"))
+    with Image.open(texture_path) as img:
+        return img.convert("RGB")
+
+def convert_to_glb(vertices, faces, normals, uvs, texture, output_glb):
+    import trimesh
+    material = trimesh.visual.material.PBRMaterial(baseColorTexture=texture, baseColorFactor=[255, 255, 255, 255])
+    visual = trimesh.visual.TextureVisuals(uv=uvs, material=material)
+    # 法線を渡すと GLB に NORMAL 属性として書き出される（渡さないとビューア側でフラットシェーディングになる）
+    mesh = trimesh.Trimesh(vertices=vertices, faces=faces, vertex_normals=normals, visual=visual, process=False)
+    from batchconv import atomic_output
+    with atomic_output(output_glb) as temp:
+        mesh.export(temp, file_type="glb")
+
+def convert(input_obj, output_glb, args):
+    workdir = tempfile.mkdtemp(prefix="vc2glb-")
+    try:
+        print("[1] メッシュ簡略化中...")
+        vertices, faces, colors, normals = simplify_mesh(input_obj, args.face_limit)
+
+        print("[2] UV展開と頂点カラー転送中...")
+        vmapping, faces, uvs = uv_unwrap(vertices, faces)
+        vertices = vertices[vmapping]
+        colors = colors[vmapping]
+        normals = normals[vmapping]
+
+        print("[3] テクスチャベイク中...")
+        texture = bake_texture(vertices, faces, colors, uvs, args.tex_size, workdir,
+                               args.baker, args.bake_jobs, args.dilate)
+        if args.save_temp:
+            texture.save(args.texture)
+
+        print("[4] GLB変換中...")
+        convert_to_glb(vertices, faces, normals, uvs, texture, output_glb)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
 
 def main():
     parser = argparse.ArgumentParser(
@@ -78,47 +97,62 @@ def main():
 
 1. メッシュを指定されたフェイス数以下に簡略化（pymeshlab使用）
 2. xatlasでUV展開（スマートUVアンラップ）
-3. 頂点カラー情報をOBJへ追加
-4. pymeshlabでテクスチャ画像へとベイク
+3. 頂点カラー情報をUV展開後の頂点へ転送
+4. テクスチャ画像へとベイク（既定は NumPy 版をマルチプロセスで、--baker meshlab で pymeshlab）
 5. GLB形式でエクスポート（trimesh使用）
 
 テクスチャ画像（PNG）はGLBに埋め込まれます。
+
+--out-dir を付けると、複数のOBJ（ファイル・ディレクトリ・グロブ）をまとめて変換します：
+  python vc2glb.py --out-dir glb/ recon/*.obj --jobs 4
 """,
         formatter_class=argparse.RawTextHelpFormatter
     )
 
-    parser.add_argument("input_obj", help="入力OBJファイル（頂点カラー付きが必須）")
-    parser.add_argument("output_glb", help="出力GLBファイル名（例: model.glb）")
+    parser.add_argument("paths", nargs="+", metavar="path",
+                        help="入力OBJファイル（頂点カラー付きが必須）と出力GLBファイル名（例: model.glb）\n"
+                             "--out-dir 指定時は入力だけを複数（ファイル・ディレクトリ・グロブ）")
 
     parser.add_argument("--face-limit", type=int, default=200000,
                         help="簡略化後の最大フェイス数（デフォルト: 200000）")
     parser.add_argument("--save-temp", action="store_true",
-                        help="中間ファイル（OBJ/MTL/PNG）を保存する")
+                        help="ベイクしたテクスチャ画像（PNG）を --texture のファイル名で保存する")
     parser.add_argument("--texture", default="baked_texture.png",
-                        help="出力するテクスチャ画像ファイル名（デフォルト: baked_texture.png）")
+                        help="保存するテクスチャ画像ファイル名（--save-temp 時、デフォルト: baked_texture.png）")
     parser.add_argument("--tex-size", type=int, default=2048,
                         help="テクスチャ画像のサイズ（幅＝高さ、デフォルト: 2048）")
+    parser.add_argument("--baker", choices=["native", "meshlab"], default="native",
+                        help="ベイク方法（native: NumPy版・並列、meshlab: pymeshlab、デフォルト: native）")
+    parser.add_argument("--bake-jobs", type=int, default=None,
+                        help="native ベイクのプロセス数（デフォルト: CPUコア数（最大 8）、バッチのワーカー内では 1）")
+    parser.add_argument("--dilate", type=int, default=4,
+                        help="native ベイクで UV 島の外側を色で埋める幅（テクセル、デフォルト: 4）")
+    parser.add_argument("--out-dir",
+                        help="バッチ変換：出力GLBを「入力名.glb」で保存するディレクトリ")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="バッチ変換のワーカープロセス数（デフォルト: 1）")
+    parser.add_argument("--force", action="store_true",
+                        help="バッチ変換で、出力が入力より新しいファイルも変換し直す")
 
     args = parser.parse_args()
 
-    print("[1] メッシュ簡略化中...")
-    simplified_obj = simplify_mesh(args.input_obj, args.face_limit)
-
-    print("[2] UV展開と頂点カラー転送中...")
-    uvcolor_obj = uv_unwrap_and_add_colors(simplified_obj)
-
-    print("[3] テクスチャベイク中...")
-    baked_obj = bake_texture(uvcolor_obj, args.texture, args.tex_size)
-
-    print("[4] GLB変換中...")
-    convert_to_glb(baked_obj, args.output_glb)
-
-    if not args.save_temp:
-        for f in [simplified_obj, uvcolor_obj, baked_obj, "temp_baked.mtl", args.texture]:
-            if os.path.exists(f):
-                os.remove(f)
-
-    print("✅ 完了:", args.output_glb)
+    if args.out_dir:
+        if args.save_temp:
+            parser.error("--save-temp は1ファイルの変換でのみ使えます")
+        from batchconv import expand_inputs, plan_outputs, run_batch
+        try:
+            pairs = plan_outputs(expand_inputs(args.paths), args.out_dir, ".glb")
+        except ValueError as e:
+            parser.error(str(e))
+        if run_batch(pairs, convert, args, args.jobs, args.force):
+            sys.exit(1)
+        return
+
+    if len(args.paths) != 2:
+        parser.error("入力OBJと出力GLBを1つずつ指定してください（複数変換は --out-dir）")
+    input_obj, output_glb = args.paths
+    convert(input_obj, output_glb, args)
+    print("✅ 完了:", output_glb)
 
 if __name__ == "__main__":
     main()
@@ -8,16 +8,37 @@
 # 🛠️ 使用例:
 #     python vc2tex.py -i input.obj -o output.obj
 #     python vc2tex.py -i input.obj -o output.zip --save-temp
+#     python vc2tex.py -i input.obj -o output.obj --baker meshlab   # pymeshlab でベイク
+#     python vc2tex.py -i recon/ --out-dir textured/ --format zip -j 4   # バッチ変換
 #
 # ===============================================
 
-import pymeshlab
 import argparse
+import io
 import os
 import sys
+import tempfile
+import time
 import zipfile
 import shutil
-from tabulate import tabulate
+import numpy as np
+
+WRITE_CHUNK = 100000
+ZLIB_DEFAULT_LEVEL = 6  # zlib の既定（Z_DEFAULT_COMPRESSION）と同じ
+
+MTL_TEXT = """#
+# Wavefront material file
+#
+
+newmtl material_0
+Ka 0.200000 0.200000 0.200000
+Kd 1.000000 1.000000 1.000000
+Ks 1.000000 1.000000 1.000000
+Tr 0.000000
+illum 2
+Ns 0.000000
+map_Kd {png}
+"""
 
 def format_size(bytesize):
     for unit in ['B', 'KB', 'MB', 'GB']:
@@ -29,34 +50,85 @@ def format_size(bytesize):
 def safe_getsize(path):
     return os.path.getsize(path) if os.path.exists(path) else 0
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="頂点カラー付きOBJをUV展開・テクスチャ化して出力（OBJ/ZIP対応）",
-        formatter_class=argparse.RawTextHelpFormatter
-    )
+def parse_zip_level(text):
+    # "stored"（無圧縮）か 0〜9 の deflate 圧縮レベル。無圧縮は None で表す
+    if text.lower() == 'stored':
+        return None
+    level = int(text)
+    if not 0 <= level <= 9:
+        raise argparse.ArgumentTypeError("0〜9 または stored を指定してください")
+    return level
 
-    parser.add_argument('--input', '-i', required=True, help='入力ファイル（.obj）')
-    parser.add_argument('--output', '-o', required=True, help='出力ファイル（.obj または .zip）')
-    parser.add_argument('--texture-size', '-t', type=int, default=2048, help='テクスチャ解像度（既定: 2048）')
-    parser.add_argument('--decimate', '-d', type=float, default=0.5, help='ポリゴン削減率（既定: 0.5）')
-    parser.add_argument('--save-temp', action='store_true', help='ZIP出力時に中間ファイルを残す')
+def write_obj(f, m, mtl_name, chunk_size=WRITE_CHUNK):
+    # save_current_mesh と同じ要素（頂点カラー・頂点法線・面の角ごとの UV・マテリアル）を、mtllib を直した形で書き出す。
+    # 書式は MeshLab とは異なり（v / vn は交互にせずまとめて出力、数値は小数6桁）、ファイルの中身は --save-temp の OBJ と一致しない
+    vertices = m.vertex_matrix()
+    colors = m.vertex_color_matrix()[:, :3]
+    normals = m.vertex_normal_matrix()
+    uvs = m.wedge_tex_coord_matrix()
+    faces = m.face_matrix() + 1  # OBJは1始まり
+    f.write(f"mtllib ./{mtl_name}\n\n")
+    for start in range(0, len(vertices), chunk_size):
+        block = np.hstack((vertices[start:start + chunk_size], colors[start:start + chunk_size]))
+        f.write(("v %.6f %.6f %.6f %.6f %.6f %.6f\n" * len(block)) % tuple(block.ravel().tolist()))
+    for start in range(0, len(normals), chunk_size):
+        block = normals[start:start + chunk_size]
+        f.write(("vn %.6f %.6f %.6f\n" * len(block)) % tuple(block.ravel().tolist()))
+    for start in range(0, len(uvs), chunk_size):
+        block = uvs[start:start + chunk_size]
+        f.write(("vt %.6f %.6f\n" * len(block)) % tuple(block.ravel().tolist()))
+    f.write("usemtl material_0\n")
+    for start in range(0, len(faces), chunk_size):
+        v = faces[start:start + chunk_size]
+        vt = np.arange(start * 3, start * 3 + v.size).reshape(-1, 3) + 1
+        block = np.stack((v, vt, v), axis=2)
+        f.write(("f %d/%d/%d %d/%d/%d %d/%d/%d\n" * len(block)) % tuple(block.ravel().tolist()))
 
-    args = parser.parse_args()
+def zip_entry(name, compression, level=None):
+    # 書き込み用エントリ。ZipFile.open に名前だけ渡すと日時が 1980-01-01 になるので、現在時刻を入れた ZipInfo を作る。
+    # 圧縮レベルは ZipFile(compresslevel=...) で指定し、ZipInfo に持たせる公開 API（compress_level、Python 3.13〜）があればそれも使う
+    info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+    info.compress_type = compression
+    info.external_attr = 0o644 << 16
+    if level is not None and hasattr(zipfile.ZipInfo, "compress_level"):
+        info.compress_level = level
+    return info
 
-    if not os.path.exists(args.input):
-        print(f"エラー: 入力ファイル {args.input} が見つかりません。", file=sys.stderr)
-        sys.exit(1)
+def write_zip(zip_path, m, base_name, write_png, level):
+    # OBJ / MTL / PNG はディスクに書かず、そのまま ZIP のエントリへ流し込む
+    compression = zipfile.ZIP_STORED if level is None else zipfile.ZIP_DEFLATED
+    if level not in (None, ZLIB_DEFAULT_LEVEL) and not hasattr(zipfile.ZipInfo, "compress_level"):
+        print(f"⚠️ Python 3.13 未満では、ストリーミング出力の OBJ は --zip-level {level} ではなく"
+              f"既定のレベル {ZLIB_DEFAULT_LEVEL} で圧縮されます（MTL には反映されます）")
+    with zipfile.ZipFile(zip_path, 'w', compression=compression, compresslevel=level) as zipf:
+        entry = zipf.open(zip_entry(base_name + ".obj", compression, level), 'w', force_zip64=True)
+        with io.TextIOWrapper(entry, encoding='utf-8', newline='\n') as f:
+            write_obj(f, m, base_name + ".mtl")
+        # 名前で渡した writestr は現在時刻と ZipFile の compression / compresslevel を使う
+        zipf.writestr(base_name + ".mtl", MTL_TEXT.format(png=base_name + ".png"))
+        # PNG はもともと圧縮されているので無圧縮で格納する
+        with zipf.open(zip_entry(base_name + ".png", zipfile.ZIP_STORED), 'w', force_zip64=True) as f:
+            write_png(f)
+        return {os.path.splitext(i.filename)[1][1:].upper(): i.file_size for i in zipf.infolist()}
 
-    base_name = os.path.splitext(os.path.basename(args.output))[0]
-    output_dir = os.path.dirname(os.path.abspath(args.output)) or "."
+def convert(input_path, output_path, args):
+    # 重いモジュールは引数チェックが済んでから import する
+    import pymeshlab
+    from batchconv import atomic_output
+
+    base_name = os.path.splitext(os.path.basename(output_path))[0]
+    output_dir = os.path.dirname(os.path.abspath(output_path)) or "."
+    os.makedirs(output_dir, exist_ok=True)
 
     temp_obj = os.path.join(output_dir, base_name + ".obj")
     temp_png = os.path.join(output_dir, base_name + ".png")
     temp_mtl = os.path.join(output_dir, base_name + ".mtl")
     png_name_only = base_name + ".png"
+    # ZIP 出力では中間ファイルを作らない（--save-temp のときだけ従来どおり OBJ/PNG/MTL も残す）
+    streaming = output_path.endswith('.zip') and not args.save_temp
 
     ms = pymeshlab.MeshSet()
-    ms.load_new_mesh(args.input)
+    ms.load_new_mesh(input_path)
 
     print("▶️ 変換前:")
     m = ms.current_mesh()
@@ -73,12 +145,50 @@ def main():
         textdim=args.texture_size, method=1
     )
 
-    ms.transfer_attributes_to_texture_per_vertex(
-        textw=args.texture_size, texth=args.texture_size, textname=png_name_only
-    )
+    if args.baker == 'native':
+        # 面の角ごとの UV と頂点カラーを取り出して NumPy 版でベイクし、メッシュのテクスチャとして登録する
+        from PIL import Image
+        from texbake import bake_vertex_colors
+        uv_tri = m.wedge_tex_coord_matrix().reshape(-1, 3, 2)
+        color_tri = m.vertex_color_matrix()[m.face_matrix()][..., :3]
+        texture = bake_vertex_colors(uv_tri, color_tri, args.texture_size, args.bake_jobs, args.dilate)
+        if streaming:
+            def write_png(f):
+                Image.fromarray(texture).save(f, format="PNG")
+        else:
+            Image.fromarray(texture).save(temp_png)
+            ms.set_texture_per_mesh(textname=os.path.abspath(temp_png))
+    else:
+        ms.transfer_attributes_to_texture_per_vertex(
+            textw=args.texture_size, texth=args.texture_size, textname=png_name_only
+        )
+
+        if streaming:
+            # pymeshlab の画像はファイルにしか保存できないので、実行ごとの一時ディレクトリを経由する
+            def write_png(f):
+                workdir = tempfile.mkdtemp(prefix="vc2tex-")
+                try:
+                    path = os.path.join(workdir, png_name_only)
+                    if os.path.exists(png_name_only):
+                        shutil.move(png_name_only, path)
+                    else:
+                        m.texture(png_name_only).save(path)
+                    with open(path, 'rb') as src:
+                        shutil.copyfileobj(src, f, 1 << 20)
+                finally:
+                    shutil.rmtree(workdir, ignore_errors=True)
+        # 新しい pymeshlab はテクスチャをメモリ上に持ち、save_current_mesh で OBJ の隣に書き出す
+        elif os.path.exists(png_name_only) and not os.path.samefile(os.getcwd(), output_dir):
+            shutil.move(png_name_only, temp_png)
 
-    if not os.path.samefile(os.getcwd(), output_dir):
-        shutil.move(png_name_only, temp_png)
+    input_size = os.path.getsize(input_path)
+    if streaming:
+        with atomic_output(output_path) as temp:
+            sizes = write_zip(temp, m, base_name, write_png, args.zip_level)
+        print(f"\n📦 ZIPアーカイブ保存: {output_path}")
+        print_sizes(input_size, sizes.get("OBJ", 0), sizes.get("PNG", 0), sizes.get("MTL", 0),
+                    safe_getsize(output_path))
+        return
 
     ms.save_current_mesh(temp_obj)
 
@@ -102,31 +212,26 @@ def main():
         print("⚠️ MTLファイルが見つかりませんでした。")
 
     # ZIP or 単体出力
-    if args.output.endswith('.zip'):
-        zip_path = args.output
-        with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_DEFLATED) as zipf:
+    if output_path.endswith('.zip'):
+        zip_path = output_path
+        compression = zipfile.ZIP_STORED if args.zip_level is None else zipfile.ZIP_DEFLATED
+        with atomic_output(zip_path) as temp, \
+                zipfile.ZipFile(temp, 'w', compression=compression, compresslevel=args.zip_level) as zipf:
             zipf.write(temp_obj, os.path.basename(temp_obj))
-            zipf.write(temp_png, os.path.basename(temp_png))
+            zipf.write(temp_png, os.path.basename(temp_png), compress_type=zipfile.ZIP_STORED)
             if os.path.exists(temp_mtl):
                 zipf.write(temp_mtl, os.path.basename(temp_mtl))
         print(f"\n📦 ZIPアーカイブ保存: {zip_path}")
-
-        if not args.save_temp:
-            for f in [temp_obj, temp_png, temp_mtl]:
-                if os.path.exists(f):
-                    os.remove(f)
-            print("🧹 一時ファイルを削除しました（--save-temp 未指定）")
     else:
         print(f"\n💾 OBJ保存: {temp_obj}")
         print(f"🖼️ テクスチャ画像保存: {temp_png}")
         print(f"📄 MTL保存: {temp_mtl if os.path.exists(temp_mtl) else 'なし'}")
 
-    # サイズ取得
-    input_size = os.path.getsize(args.input)
-    obj_size = safe_getsize(temp_obj)
-    png_size = safe_getsize(temp_png)
-    mtl_size = safe_getsize(temp_mtl)
-    zip_size = safe_getsize(args.output) if args.output.endswith('.zip') else 0
+    zip_size = safe_getsize(output_path) if output_path.endswith('.zip') else 0
+    print_sizes(input_size, safe_getsize(temp_obj), safe_getsize(temp_png), safe_getsize(temp_mtl), zip_size)
+
+def print_sizes(input_size, obj_size, png_size, mtl_size, zip_size):
+    from tabulate import tabulate
 
     # 表構築（INPUT/OUTPUT区切り＋ZIP前にも区切り線）
     table = []
@@ -145,6 +250,50 @@ def main():
 
     print("🔧 処理完了。")
 
+def main():
+    parser = argparse.ArgumentParser(
+        description="頂点カラー付きOBJをUV展開・テクスチャ化して出力（OBJ/ZIP対応）",
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+
+    parser.add_argument('--input', '-i', required=True, nargs='+',
+                        help='入力ファイル（.obj）。--out-dir 指定時は複数（ファイル・ディレクトリ・グロブ）')
+    parser.add_argument('--output', '-o', help='出力ファイル（.obj または .zip）')
+    parser.add_argument('--texture-size', '-t', type=int, default=2048, help='テクスチャ解像度（既定: 2048）')
+    parser.add_argument('--decimate', '-d', type=float, default=0.5, help='ポリゴン削減率（既定: 0.5）')
+    parser.add_argument('--save-temp', action='store_true', help='ZIP出力時に中間ファイル（OBJ/PNG/MTL）も出力先に残す')
+    parser.add_argument('--zip-level', type=parse_zip_level, default=6,
+                        help='ZIP内の OBJ/MTL の圧縮レベル 0〜9、または stored（無圧縮）（既定: 6）。PNG は常に無圧縮で格納')
+    parser.add_argument('--baker', choices=['native', 'meshlab'], default='native',
+                        help='ベイク方法（native: NumPy版・並列、meshlab: pymeshlab、既定: native）')
+    parser.add_argument('--bake-jobs', type=int, default=None, help='native ベイクのプロセス数（既定: CPUコア数、最大 8）')
+    parser.add_argument('--dilate', type=int, default=4, help='native ベイクで UV 島の外側を色で埋める幅（既定: 4）')
+    parser.add_argument('--out-dir', help='バッチ変換：出力を「入力名.obj / 入力名.zip」で保存するディレクトリ')
+    parser.add_argument('--format', choices=['obj', 'zip'], default='obj', help='バッチ変換の出力形式（既定: obj）')
+    parser.add_argument('--jobs', '-j', type=int, default=1, help='バッチ変換のワーカープロセス数（既定: 1）')
+    parser.add_argument('--force', action='store_true', help='バッチ変換で、出力が入力より新しいファイルも変換し直す')
+
+    args = parser.parse_args()
+
+    if args.out_dir:
+        from batchconv import expand_inputs, plan_outputs, run_batch
+        try:
+            pairs = plan_outputs(expand_inputs(args.input), args.out_dir, '.' + args.format)
+        except ValueError as e:
+            parser.error(str(e))
+        if run_batch(pairs, convert, args, args.jobs, args.force):
+            sys.exit(1)
+        return
+
+    if len(args.input) != 1 or not args.output:
+        parser.error('入力（-i）と出力（-o）を1つずつ指定してください（複数変換は --out-dir）')
+    input_path = args.input[0]
+    if not os.path.exists(input_path):
+        print(f"エラー: 入力ファイル {input_path} が見つかりません。", file=sys.stderr)
+        sys.exit(1)
+
+    convert(input_path, args.output, args)
+
 if __name__ == '__main__':
     main()
 